@@ -1,21 +1,24 @@
+from ruta_codigo import Ruta
+
 def collatz(n):
     if n % 2 == 0:
         return n // 2, "R"
     else:
         return (n * 3) + 1, "L"
 
-def generar_arbol_multiple(lista_inicio, niveles):
+def iterar_arbol_multiple(lista_inicio, niveles):
+    # Entrega un nivel a la vez y solo conserva la frontera actual.
     # El primer nivel es un diccionario donde la clave es la ruta vacía ""
-    arbol = [{"": lista_inicio}]
+    nodos_actuales = {Ruta.raiz(): lista_inicio}
+    yield nodos_actuales
     
     for q1 in range(niveles):
-        nodos_actuales = arbol[-1]
         proximo_nivel = {}
         
         for ruta, semillas in nodos_actuales.items():
             # Creamos dos nuevas rutas basadas en la anterior
-            ruta_r = ruta + "R"
-            ruta_l = ruta + "L"
+            ruta_r = ruta.hijo("R")
+            ruta_l = ruta.hijo("L")
             
             grupo_r = []
             grupo_l = []
@@ -31,17 +34,20 @@ def generar_arbol_multiple(lista_inicio, niveles):
             if grupo_r: proximo_nivel[ruta_r] = grupo_r
             if grupo_l: proximo_nivel[ruta_l] = grupo_l
             
-        arbol.append(proximo_nivel)
-    return arbol
+        nodos_actuales = proximo_nivel
+        yield nodos_actuales
+
+def generar_arbol_multiple(lista_inicio, niveles):
+    return list(iterar_arbol_multiple(lista_inicio, niveles))
 
 myrange=1048576
 semillas = list(range(1, myrange+1))
 niveles_simulacion = 8
-resultado = generar_arbol_multiple(semillas, niveles_simulacion)
+resultado = iterar_arbol_multiple(semillas, niveles_simulacion)
 
 # Visualización
 for i, nivel in enumerate(resultado):
     print(f"\nNIVEL {i}")
     for ruta, valores in sorted(nivel.items()):
-        id_ruta = ruta if ruta != "" else "INICIO"
+        id_ruta = str(ruta) or "INICIO"
         print(f"{id_ruta:5} | Len:{len(valores):2} | {valores[:10]}...")
\ No newline at end of file
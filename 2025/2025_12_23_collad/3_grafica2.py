@@ -1,3 +1,6 @@
+from patrones import IndicePatrones, detectar_patrones_nivel, formatear_patron
+from ruta_codigo import Ruta
+
 def collatz2(n):
     if n % 2 == 0:
         return n-1, "R"
@@ -13,69 +16,58 @@ def collatz(n):
         return n // 2, "R"
     else:
         return (n * 3) + 1, "L"
-def detectar_patron(valores):
-    if len(valores) < 3: 
-        return "" # No hay suficientes datos para asegurar un patrón
-    
-    # Calculamos el salto esperado (B) entre los dos primeros elementos
-    salto = valores[1] - valores[0]
-    
-    # Verificamos si TODA la muestra sigue ese mismo salto
-    es_aritmetica = True
-    for i in range(len(valores) - 1):
-        if valores[i+1] - valores[i] != salto:
-            es_aritmetica = False
-            break
-    
-    if es_aritmetica:
-        inicio = valores[0]
-        return f"(>{inicio}n{salto})"
-    else:
-        # ¡ALERTA! La serie ha dejado de ser una progresión aritmética simple
-        return "!!!!!!!" 
-
-def generar_arbol_con_marcas(lista_inicio, niveles):
-    arbol = [{"": lista_inicio}]
+paso = collatz  # collatz2 o collatz3 para probar los otros mapas
+def iterar_arbol_con_marcas(lista_inicio, niveles):
+    # Entrega un nivel a la vez y solo conserva la frontera actual
+    nodos_actuales = {Ruta.raiz(): lista_inicio}
+    yield nodos_actuales
     for q1 in range(niveles):
-        nodos_actuales = arbol[-1]
         proximo_nivel = {}
         for ruta, semillas in nodos_actuales.items():
-            ruta_r, ruta_l = ruta + "R", ruta + "L"
+            ruta_r, ruta_l = ruta.hijo("R"), ruta.hijo("L")
             grupo_r, grupo_l = [], []
             for s in semillas:
-                nuevo_val, b = collatz(s)
+                nuevo_val, b = paso(s)
                 if b == "R": grupo_r.append(nuevo_val)
                 else: grupo_l.append(nuevo_val)
             if grupo_r: proximo_nivel[ruta_r] = grupo_r
             if grupo_l: proximo_nivel[ruta_l] = grupo_l
-        arbol.append(proximo_nivel)
-    return arbol
+        nodos_actuales = proximo_nivel
+        yield nodos_actuales
+
+def generar_arbol_con_marcas(lista_inicio, niveles):
+    return list(iterar_arbol_con_marcas(lista_inicio, niveles))
 
 MypowRange=20
 RangoDenumeros = pow(2, MypowRange)
 semillas = list(range(1, RangoDenumeros + 1))
 #semillas = list(range(-RangoDenumeros, 0))
 niveles_simulacion = 8
-resultado = generar_arbol_con_marcas(semillas, niveles_simulacion)
+resultado = iterar_arbol_con_marcas(semillas, niveles_simulacion)
 
-historial_valores = {}
+indice = IndicePatrones.para_script(__file__, semillas, paso)
 
-for i, nivel in enumerate(resultado):
-    print(f"\nNIVEL {i}")
-    for ruta, valores in sorted(nivel.items()):
-        id_ruta = ruta if ruta != "" else "INICIO"
+def imprimir_niveles(niveles):
+    # Etapa de impresión: marca cada nivel y lo pasa a la siguiente etapa
+    for i, nivel in enumerate(niveles):
+        print(f"\nNIVEL {i}")
+        patrones_nivel = detectar_patrones_nivel(nivel, muestra=100)
+        for ruta, valores in sorted(nivel.items()):
+            id_ruta = str(ruta) or "INICIO"
         
-        huella = tuple(valores[:5])
-        if huella in historial_valores:
-            marca = "*"
-        else:
-            marca = "#"
-            historial_valores[huella] = ruta
+            patron_nodo = patrones_nivel[ruta] # Analizamos los primeros 100 para estar seguros
+            if patron_nodo.es_simple and indice.es_duplicado(patron_nodo.tupla(), ruta, i):
+                marca = "*"
+            else:
+                marca = "#"
             
-        patron = detectar_patron(valores[:100]) # Analizamos los primeros 100 para estar seguros
+            patron = formatear_patron(patron_nodo)
         
-        print(f"{id_ruta:12} | Len:{len(valores)} | {patron}{marca}")
-        #print(f"{id_ruta:12} | Len:{len(valores):7} | {patron}{marca} | {valores[:0]}...")
+            print(f"{id_ruta:12} | Len:{len(valores)} | {patron}{marca}")
+            #print(f"{id_ruta:12} | Len:{len(valores):7} | {patron}{marca} | {valores[:0]}...")
+        yield nivel
+    indice.guardar()
+
 import numpy as np
 import matplotlib.pyplot as plt
 
@@ -127,4 +119,4 @@ def generar_onda_collatz(resultado):
     plt.show()
 
 # Para ejecutarlo, simplemente añade esta línea al final de tu código:
-generar_onda_collatz(resultado)
\ No newline at end of file
+generar_onda_collatz(imprimir_niveles(resultado))
\ No newline at end of file
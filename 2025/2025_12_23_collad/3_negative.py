@@ -1,5 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from ciclos import detectar_ciclos, resumen_ciclos
+from ruta_codigo import Ruta
 
 # --- LÓGICA DE PROCESAMIENTO ---
 
@@ -9,23 +11,14 @@ def collatz(n):
     else:
         return (n * 3) + 1, "L"
 
-def detectar_patron(valores):
-    if len(valores) < 3: return ""
-    salto = valores[1] - valores[0]
-    es_aritmetica = all(valores[i+1] - valores[i] == salto for i in range(len(valores) - 1))
-    
-    if es_aritmetica:
-        inicio = valores[0]
-        return f"(>{inicio}n{salto})"
-    return "!!!!!!!" 
-
-def generar_arbol_con_marcas(lista_inicio, niveles):
-    arbol = [{"": lista_inicio}]
+def iterar_arbol_con_marcas(lista_inicio, niveles):
+    # Entrega un nivel a la vez y solo conserva la frontera actual
+    nodos_actuales = {Ruta.raiz(): lista_inicio}
+    yield nodos_actuales
     for q1 in range(niveles):
-        nodos_actuales = arbol[-1]
         proximo_nivel = {}
         for ruta, semillas in nodos_actuales.items():
-            ruta_r, ruta_l = ruta + "R", ruta + "L"
+            ruta_r, ruta_l = ruta.hijo("R"), ruta.hijo("L")
             grupo_r, grupo_l = [], []
             for s in semillas:
                 nuevo_val, b = collatz(s)
@@ -33,8 +26,11 @@ def generar_arbol_con_marcas(lista_inicio, niveles):
                 else: grupo_l.append(nuevo_val)
             if grupo_r: proximo_nivel[ruta_r] = grupo_r
             if grupo_l: proximo_nivel[ruta_l] = grupo_l
-        arbol.append(proximo_nivel)
-    return arbol
+        nodos_actuales = proximo_nivel
+        yield nodos_actuales
+
+def generar_arbol_con_marcas(lista_inicio, niveles):
+    return list(iterar_arbol_con_marcas(lista_inicio, niveles))
 
 # --- SIMULACIÓN NEGATIVA ---
 MypowRange = 20
@@ -42,7 +38,11 @@ RangoDenumeros = pow(2, MypowRange)
 # Semillas negativas: de -1048576 a -1
 semillas = list(range(-RangoDenumeros, 0)) 
 niveles_simulacion = 4
-resultado = generar_arbol_con_marcas(semillas, niveles_simulacion)
+resultado = iterar_arbol_con_marcas(semillas, niveles_simulacion)
+
+# Ciclo al que cae cada semilla (-1, -5 o -17 en el universo negativo)
+for identificador, (cantidad, longitud) in resumen_ciclos(detectar_ciclos(semillas)).items():
+    print(f"Ciclo {identificador} (largo {longitud}): {cantidad} semillas")
 
 # --- VISUALIZACIÓN ADAPTADA A NEGATIVOS ---
 
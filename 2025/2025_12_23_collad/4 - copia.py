@@ -1,54 +1,57 @@
+from patrones import IndicePatrones, detectar_patrones_nivel, formatear_patron
+from ruta_codigo import Ruta
+
 def collatz(n):
     if n % 2 == 0: return n // 2, "R"
     else: return (n * 3) + 1, "L"
 
-def detectar_patron(valores):
-    if len(valores) < 3: return ""
-    salto = valores[1] - valores[0]
-    if all(valores[i+1] - valores[i] == salto for i in range(len(valores)-1)):
-        return f"(>{valores[0]}n{salto})"
-    return "!!!!!!!"
-
-def generar_arbol(lista_inicio, niveles):
-    arbol = [{"": lista_inicio}]
+def iterar_arbol(lista_inicio, niveles):
+    # Entrega un nivel a la vez y solo conserva la frontera actual
+    actual = {Ruta.raiz(): lista_inicio}
+    yield actual
     for _ in range(niveles):
-        actual, proximo = arbol[-1], {}
+        proximo = {}
         for ruta, semillas in actual.items():
             r, l = [], []
             for s in semillas:
                 v, b = collatz(s)
                 if b == "R": r.append(v)
                 else: l.append(v)
-            if r: proximo[ruta + "R"] = r
-            if l: proximo[ruta + "L"] = l
-        arbol.append(proximo)
-    return arbol
+            if r: proximo[ruta.hijo("R")] = r
+            if l: proximo[ruta.hijo("L")] = l
+        actual = proximo
+        yield actual
+
+def generar_arbol(lista_inicio, niveles):
+    return list(iterar_arbol(lista_inicio, niveles))
 
 # Configuración
 MypowRange = 20
 semillas = list(range(1, pow(2, MypowRange) + 1))
 niveles_simulacion = 16
-resultado = generar_arbol(semillas, niveles_simulacion)
+resultado = iterar_arbol(semillas, niveles_simulacion)
 
-historial_huellas = {}
+indice = IndicePatrones.para_script(__file__, semillas, collatz)
 
 for i, nivel in enumerate(resultado):
     print(f"\nNIVEL {i}")
     rutas_nuevas = []
     rutas_repetidas = []
+    patrones_nivel = detectar_patrones_nivel(nivel, muestra=100)
 
     for ruta in sorted(nivel.keys()):
         valores = nivel[ruta]
-        huella = tuple(valores[:16])
-        patron = detectar_patron(valores[:])
+        patron_nodo = patrones_nivel[ruta]
+        patron = formatear_patron(patron_nodo)
         
-        if huella in historial_huellas:
+        if patron_nodo.es_simple and indice.es_duplicado(patron_nodo.tupla(), ruta, i):
             rutas_repetidas.append(f"{ruta:12} | Len:{len(valores):7} | {patron}*")
         else:
-            historial_huellas[huella] = ruta
             rutas_nuevas.append(f"{ruta:12} | Len:{len(valores):7} | {patron}#")
     for r in rutas_nuevas:
     	print(r)
     	
     if rutas_repetidas:
-        print(f"NIVEL {i}-1 (Simetría: {len(rutas_repetidas)} rutas repetidas)")
\ No newline at end of file
+        print(f"NIVEL {i}-1 (Simetría: {len(rutas_repetidas)} rutas repetidas)")
+
+indice.guardar()
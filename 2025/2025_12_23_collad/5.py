@@ -1,3 +1,6 @@
+from patrones import IndicePatrones, detectar_patrones_nivel, formatear_patron
+from ruta_codigo import Ruta
+
 class NodoCollatz:
     def __init__(self, inicio, salto, ruta, nivel):
         self.desplazamiento = inicio        # El "desplazamiento" (primer número de la serie)
@@ -12,50 +15,48 @@ def collatz(n):
     if n % 2 == 0: return n // 2, "R"
     else: return (n * 3) + 1, "L"
 
-def detectar_patron(valores):
-    if len(valores) < 3: return ""
-    salto = valores[1] - valores[0]
-    if all(valores[i+1] - valores[i] == salto for i in range(len(valores)-1)):
-        return f"(>{valores[0]}n{salto})"
-    return "!!!!!!!"
-
-def generar_arbol(lista_inicio, niveles):
-    arbol = [{"": lista_inicio}]
+def iterar_arbol(lista_inicio, niveles):
+    # Entrega un nivel a la vez y solo conserva la frontera actual
+    actual = {Ruta.raiz(): lista_inicio}
+    yield actual
     for _ in range(niveles):
-        actual, proximo = arbol[-1], {}
+        proximo = {}
         for ruta, semillas in actual.items():
             r, l = [], []
             for s in semillas:
                 v, b = collatz(s)
                 if b == "R": r.append(v)
                 else: l.append(v)
-            if r: proximo[ruta + "R"] = r
-            if l: proximo[ruta + "L"] = l
-        arbol.append(proximo)
-    return arbol
+            if r: proximo[ruta.hijo("R")] = r
+            if l: proximo[ruta.hijo("L")] = l
+        actual = proximo
+        yield actual
+
+def generar_arbol(lista_inicio, niveles):
+    return list(iterar_arbol(lista_inicio, niveles))
 
 MypowRange = 20
 semillas = list(range(1, pow(2, MypowRange) + 1))
 niveles_simulacion = 5
-resultado = generar_arbol(semillas, niveles_simulacion)
+resultado = iterar_arbol(semillas, niveles_simulacion)
 
-historial_patrones = {}
+indice = IndicePatrones.para_script(__file__, semillas, collatz)
 
 for i, nivel in enumerate(resultado):
     print(f"\nNIVEL {i}")
+    patrones_nivel = detectar_patrones_nivel(nivel, muestra=100)
     
     rutas_imprimir = []
     rutas_simetria_R = []
 
     for ruta in sorted(nivel.keys()):
         valores = nivel[ruta]
-        patron = detectar_patron(valores[:100])
-        if patron in historial_patrones and patron != "!!!!!!!":
+        patron_nodo = patrones_nivel[ruta]
+        patron = formatear_patron(patron_nodo)
+        if patron_nodo.es_simple and indice.es_duplicado(patron_nodo.tupla(), ruta, i):
             marca = "*"
         else:
             marca = "#"
-            if patron != "!!!!!!!":
-                historial_patrones[patron] = ruta
         linea = f"{ruta:12} | Len:{len(valores):7} | {patron}{marca}"
         if ruta.startswith("R"):
             rutas_simetria_R.append(linea)
@@ -64,4 +65,6 @@ for i, nivel in enumerate(resultado):
     for r in rutas_imprimir:
         print(r)
     if rutas_simetria_R:
-        print(f"NIVEL {i}-1 (Simetría R) Rutas: {len(rutas_simetria_R)}")	
\ No newline at end of file
+        print(f"NIVEL {i}-1 (Simetría R) Rutas: {len(rutas_simetria_R)}")	
+
+indice.guardar()
\ No newline at end of file
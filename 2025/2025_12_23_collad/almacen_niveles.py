@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+from collections.abc import Mapping
+
+import numpy as np
+from paso_hibrido import desborde_impar
+from ruta_codigo import Ruta
+
+# Almacén en disco del árbol de particiones para rangos que no caben en RAM.
+# Cada nivel se guarda como tres archivos dentro de un directorio:
+#   nivel_{i}.datos        -> todos los valores del nivel, int64 y nodo tras nodo
+#   nivel_{i}.rutas.npy    -> el código Ruta de cada nodo, en el orden de escritura
+#   nivel_{i}.offsets.npy  -> inicio de cada nodo dentro de .datos (más el final)
+# manifiesto.json guarda cuántos niveles están completos; un nivel solo cuenta
+# cuando sus tres archivos ya se renombraron, así que tras una caída se retoma
+# desde el último nivel completo. También guarda qué semillas tiene el nivel 0,
+# para no retomar un directorio construido con otras.
+
+BLOQUE = 1 << 22  # valores por lectura/escritura, acota la memoria usada
+
+class NivelMmap(Mapping):
+    # Vista de solo lectura de un nivel: se comporta como el dict {ruta: valores}
+    # de generar_arbol, pero cada valores es un trozo del memmap (sin copiar).
+    def __init__(self, datos, rutas, offsets):
+        self.datos = datos
+        self.rutas = rutas
+        self.offsets = offsets
+        self._indice = None
+
+    def _posicion(self, ruta):
+        if self._indice is None:
+            self._indice = {int(codigo): i for i, codigo in enumerate(self.rutas)}
+        return self._indice[int(ruta)]
+
+    def __getitem__(self, ruta):
+        i = self._posicion(ruta)
+        return self.datos[self.offsets[i]:self.offsets[i + 1]]
+
+    def __iter__(self):
+        for codigo in self.rutas:
+            yield Ruta(int(codigo))
+
+    def __len__(self):
+        return len(self.rutas)
+
+class AlmacenNiveles:
+    def __init__(self, directorio):
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+        self._manifiesto = os.path.join(directorio, "manifiesto.json")
+        self.semillas = None
+        if os.path.exists(self._manifiesto):
+            with open(self._manifiesto) as f:
+                manifiesto = json.load(f)
+            self.niveles_completos = manifiesto["niveles_completos"]
+            self.semillas = manifiesto.get("semillas")
+        else:
+            self.niveles_completos = 0
+
+    def _archivo(self, i, parte):
+        return os.path.join(self.directorio, f"nivel_{i}.{parte}")
+
+    def nivel(self, i):
+        if i >= self.niveles_completos:
+            raise IndexError(f"El nivel {i} no está completo en {self.directorio}")
+        rutas = np.load(self._archivo(i, "rutas.npy"), allow_pickle=True)
+        offsets = np.load(self._archivo(i, "offsets.npy"))
+        if offsets[-1] == 0:
+            datos = np.zeros(0, dtype=np.int64)
+        else:
+            datos = np.memmap(self._archivo(i, "datos"), dtype=np.int64, mode="r")
+        return NivelMmap(datos, rutas, offsets)
+
+    def __len__(self):
+        return self.niveles_completos
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.niveles_completos
+        return self.nivel(i)
+
+    def __iter__(self):
+        for i in range(self.niveles_completos):
+            yield self.nivel(i)
+
+    def _cerrar_nivel(self, i, rutas, offsets):
+        # Primero los índices y los datos, al final el manifiesto
+        np.save(self._archivo(i, "rutas.tmp.npy"), _arreglo_rutas(rutas))
+        np.save(self._archivo(i, "offsets.tmp.npy"), np.asarray(offsets, dtype=np.int64))
+        os.replace(self._archivo(i, "datos.tmp"), self._archivo(i, "datos"))
+        os.replace(self._archivo(i, "rutas.tmp.npy"), self._archivo(i, "rutas.npy"))
+        os.replace(self._archivo(i, "offsets.tmp.npy"), self._archivo(i, "offsets.npy"))
+        temporal = self._manifiesto + ".tmp"
+        with open(temporal, "w") as f:
+            json.dump({"niveles_completos": i + 1, "semillas": self.semillas}, f)
+        os.replace(temporal, self._manifiesto)
+        self.niveles_completos = i + 1
+
+    def escribir_inicio(self, lista_inicio):
+        self.semillas = describir_semillas(lista_inicio)
+        with open(self._archivo(0, "datos.tmp"), "wb") as f:
+            total = _escribir_semillas(f, lista_inicio)
+        self._cerrar_nivel(0, [Ruta.raiz()], [0, total])
+
+    def escribir_siguiente(self):
+        # Lee el último nivel completo y escribe el siguiente, un bloque a la vez.
+        # Cada nodo se recorre dos veces: primero los pares (R) y luego los impares (L),
+        # para que los valores de cada ruta queden contiguos en el archivo.
+        i = self.niveles_completos
+        anterior = self.nivel(i - 1)
+        rutas, offsets, total = [], [0], 0
+        with open(self._archivo(i, "datos.tmp"), "wb") as f:
+            for ruta in anterior:
+                valores = anterior[ruta]
+                for letra in ("R", "L"):
+                    escritos = 0
+                    for inicio in range(0, len(valores), BLOQUE):
+                        bloque = np.asarray(valores[inicio:inicio + BLOQUE])
+                        pares = (bloque & 1) == 0
+                        if letra == "R":
+                            grupo = bloque[pares] >> 1
+                        else:
+                            impares = bloque[~pares]
+                            if desborde_impar(impares).any():
+                                raise OverflowError(f"3n+1 se sale de int64 en la ruta {ruta}; "
+                                                    "el almacén solo guarda valores int64")
+                            grupo = impares * 3 + 1
+                        grupo.tofile(f)
+                        escritos += len(grupo)
+                    if escritos:
+                        total += escritos
+                        rutas.append(ruta.hijo(letra))
+                        offsets.append(total)
+        self._cerrar_nivel(i, rutas, offsets)
+
+def _arreglo_rutas(rutas):
+    # int64 mientras las rutas quepan, si no enteros de Python
+    if all(int(r).bit_length() < 63 for r in rutas):
+        return np.asarray([int(r) for r in rutas], dtype=np.int64)
+    return np.asarray([int(r) for r in rutas], dtype=object)
+
+def _escribir_semillas(f, lista_inicio):
+    if isinstance(lista_inicio, range) and lista_inicio.step == 1:
+        total = 0
+        for inicio in range(lista_inicio.start, lista_inicio.stop, BLOQUE):
+            bloque = np.arange(inicio, min(inicio + BLOQUE, lista_inicio.stop), dtype=np.int64)
+            bloque.tofile(f)
+            total += len(bloque)
+        return total
+    valores = np.asarray(lista_inicio, dtype=np.int64)
+    valores.tofile(f)
+    return len(valores)
+
+def describir_semillas(lista_inicio):
+    # Un range de paso 1 se describe por sus extremos; cualquier otra lista por su
+    # cantidad y un hash de sus valores int64
+    if isinstance(lista_inicio, range) and lista_inicio.step == 1:
+        return {"inicio": lista_inicio.start, "fin": lista_inicio.stop}
+    valores = np.asarray(lista_inicio, dtype=np.int64)
+    return {"cantidad": len(valores), "huella": hashlib.blake2b(valores.tobytes(), digest_size=16).hexdigest()}
+
+def construir_en_almacen(directorio, lista_inicio, niveles):
+    # Construye (o retoma) el árbol hasta `niveles` y devuelve el almacén
+    almacen = AlmacenNiveles(directorio)
+    if almacen.niveles_completos == 0:
+        almacen.escribir_inicio(lista_inicio)
+    elif almacen.semillas is not None and almacen.semillas != describir_semillas(lista_inicio):
+        raise ValueError(f"{directorio} se construyó con otras semillas ({almacen.semillas}); "
+                         "use otro directorio o bórrelo para empezar de nuevo")
+    while almacen.niveles_completos <= niveles:
+        almacen.escribir_siguiente()
+    return almacen
+
+if __name__ == "__main__":
+    MypowRange = 20
+    niveles_simulacion = 8
+    almacen = construir_en_almacen("arbol_mmap", range(1, pow(2, MypowRange) + 1), niveles_simulacion)
+
+    for i, nivel in enumerate(almacen):
+        print(f"\nNIVEL {i}")
+        for ruta, valores in sorted(nivel.items()):
+            id_ruta = str(ruta) or "INICIO"
+            print(f"{id_ruta:5} | Len:{len(valores):2} | {valores[:10].tolist()}...")
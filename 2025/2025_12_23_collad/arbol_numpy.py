@@ -0,0 +1,66 @@
+import numpy as np
+from paso_hibrido import ArregloHibrido, desborde_impar, simplificar
+from reglas import COLLATZ, paso_regla
+from ruta_codigo import Ruta
+
+# Motor vectorizado del árbol de particiones R/L.
+# Cada nodo guarda sus semillas como un arreglo int64 y se divide de una sola vez:
+# máscara de paridad, //2 para los pares (R) y 3n+1 para los impares (L).
+# Produce la misma estructura [{ruta: valores}] que generar_arbol_multiple.
+# Si algún 3n+1 se sale de int64, solo ese nodo pasa a ArregloHibrido (paso_hibrido.py).
+# Con otra regla (reglas.py) el paso es el núcleo genérico paso_regla.
+
+def semillas_rango(inicio, fin):
+    # Equivalente a list(range(inicio, fin)) pero sin pasar por enteros de Python
+    return np.arange(inicio, fin, dtype=np.int64)
+
+def valores_iniciales(lista_inicio):
+    if isinstance(lista_inicio, range) and -2**63 <= min(lista_inicio.start, lista_inicio.stop) and max(lista_inicio.start, lista_inicio.stop) < 2**63:
+        return np.arange(lista_inicio.start, lista_inicio.stop, lista_inicio.step, dtype=np.int64)
+    try:
+        return np.asarray(lista_inicio, dtype=np.int64)
+    except OverflowError:
+        return simplificar(ArregloHibrido.desde(np.asarray(list(lista_inicio), dtype=object)))
+
+def collatz_vectorizado(valores, regla=None):
+    if regla is not None and regla is not COLLATZ:
+        return paso_regla(valores, regla)
+    if isinstance(valores, ArregloHibrido):
+        grupo_r, grupo_l = valores.paso()
+        return simplificar(grupo_r), simplificar(grupo_l)
+    pares = (valores & 1) == 0
+    impares = valores[~pares]
+    if desborde_impar(impares).any():
+        return collatz_vectorizado(ArregloHibrido(valores))
+    grupo_r = valores[pares] >> 1
+    grupo_l = impares * 3 + 1
+    return grupo_r, grupo_l
+
+def iterar_arbol_numpy(lista_inicio, niveles, regla=None):
+    # Entrega un nivel a la vez y solo conserva la frontera actual
+    actual = {Ruta.raiz(): valores_iniciales(lista_inicio)}
+    yield actual
+    for _ in range(niveles):
+        proximo = {}
+        for ruta, semillas in actual.items():
+            grupo_r, grupo_l = collatz_vectorizado(semillas, regla)
+            # Solo agregamos la ruta si tiene semillas
+            if len(grupo_r): proximo[ruta.hijo("R")] = grupo_r
+            if len(grupo_l): proximo[ruta.hijo("L")] = grupo_l
+        actual = proximo
+        yield actual
+
+def generar_arbol_numpy(lista_inicio, niveles, regla=None):
+    return list(iterar_arbol_numpy(lista_inicio, niveles, regla))
+
+if __name__ == "__main__":
+    MypowRange = 20
+    semillas = semillas_rango(1, pow(2, MypowRange) + 1)
+    niveles_simulacion = 8
+    resultado = iterar_arbol_numpy(semillas, niveles_simulacion)
+
+    for i, nivel in enumerate(resultado):
+        print(f"\nNIVEL {i}")
+        for ruta, valores in sorted(nivel.items()):
+            id_ruta = str(ruta) or "INICIO"
+            print(f"{id_ruta:5} | Len:{len(valores):2} | {valores[:10].tolist()}...")
@@ -0,0 +1,101 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from arbol_numpy import iterar_arbol_numpy, valores_iniciales
+from paso_hibrido import ArregloHibrido, como_arreglo, simplificar
+from ruta_codigo import Ruta
+
+# Construcción paralela del árbol de particiones por clases de residuo.
+# Las primeras k decisiones R/L de n dependen solo de n mod 2^k, así que cada
+# fragmento {n : n ≡ r (mod 2^k)} se puede construir por separado en otro proceso.
+# Al revés, las semillas de una ruta con m decisiones libres (las R, más la última
+# letra si es L: después de una L la R es forzada) son una clase mod 2^m. Si m >= k
+# la ruta sale entera de un solo fragmento y ya está en orden de semilla; si no,
+# cada fragmento aporta las semillas de una posición fija cada 2^k / 2^m, así que
+# los valores se intercalan por posición sin ordenar nada.
+
+def construir_fragmento(residuo, modulo, inicio, fin, niveles):
+    # Devuelve cada nivel compacto: (códigos de ruta, largos, valores concatenados),
+    # que se serializa como unos pocos arreglos en vez de un dict de arreglos chicos.
+    # El nivel 0 (las semillas) no se devuelve: el proceso principal ya lo conoce.
+    primera = inicio + (residuo - inicio) % modulo
+    semillas = np.arange(primera, fin, modulo, dtype=np.int64)
+    if len(semillas) == 0:
+        return None
+    compactos = []
+    for i, nivel in enumerate(iterar_arbol_numpy(semillas, niveles)):
+        if i == 0:
+            continue
+        valores = [como_arreglo(v) for v in nivel.values()]
+        largos = np.array([len(v) for v in valores], dtype=np.int64)
+        compactos.append(([int(ruta) for ruta in nivel], largos, np.concatenate(valores)))
+    return compactos
+
+def _modulo_ruta(ruta):
+    libres = ruta.count("R") + (ruta.longitud > 0 and ruta.ultima() == "L")
+    return 1 << libres
+
+def _intercalar(trozos, inicio, modulo, modulo_ruta):
+    # El fragmento en la posición p aporta las semillas p, p + paso, p + 2*paso...
+    paso = modulo // modulo_ruta
+    total = sum(len(v) for _, v in trozos)
+    tipo = object if any(v.dtype == object for _, v in trozos) else np.int64
+    por_posicion = {(residuo - inicio) % modulo // modulo_ruta: v for residuo, v in trozos}
+    if len(por_posicion) == paso:
+        # Todos presentes (los primeros con a lo sumo un valor más): matriz paso × largo
+        # y una transposición contigua, mucho más rápida que escribir con salto
+        largo = max(len(v) for v in por_posicion.values())
+        matriz = np.empty((paso, largo), dtype=tipo)
+        for posicion, v in por_posicion.items():
+            matriz[posicion, :len(v)] = v
+        return np.ascontiguousarray(matriz.T).ravel()[:total]
+    valores = np.empty(total, dtype=tipo)
+    for posicion, v in por_posicion.items():
+        valores[posicion:posicion + paso * len(v):paso] = v
+    return valores
+
+def unir_fragmentos(fragmentos, niveles, inicio, fin, modulo):
+    # fragmentos[r] es el resultado de construir_fragmento para el residuo r
+    arbol = [{Ruta.raiz(): valores_iniciales(range(inicio, fin))}]
+    for i in range(niveles):
+        partes = {}
+        for residuo, fragmento in enumerate(fragmentos):
+            if fragmento is None:
+                continue
+            codigos, largos, plano = fragmento[i]
+            fines = np.cumsum(largos).tolist()
+            for codigo, desde, hasta in zip(codigos, [0] + fines[:-1], fines):
+                partes.setdefault(codigo, []).append((residuo, plano[desde:hasta]))
+        # Mismo orden de inserción que el constructor serial: padre por padre, R antes que L
+        nivel = {}
+        for codigo in sorted(partes, reverse=True):
+            ruta = Ruta(codigo)
+            trozos = partes[codigo]
+            if len(trozos) == 1:
+                valores = trozos[0][1]
+            else:
+                valores = _intercalar(trozos, inicio, modulo, _modulo_ruta(ruta))
+            nivel[ruta] = simplificar(ArregloHibrido.desde(valores))
+        arbol.append(nivel)
+    return arbol
+
+def generar_arbol_paralelo(inicio, fin, niveles, k=5, procesos=None):
+    # Equivale a generar_arbol_numpy(semillas_rango(inicio, fin), niveles)
+    modulo = pow(2, k)
+    procesos = procesos or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        tareas = [pool.submit(construir_fragmento, r, modulo, inicio, fin, niveles) for r in range(modulo)]
+        fragmentos = [t.result() for t in tareas]
+    return unir_fragmentos(fragmentos, niveles, inicio, fin, modulo)
+
+if __name__ == "__main__":
+    MypowRange = 20
+    niveles_simulacion = 8
+    resultado = generar_arbol_paralelo(1, pow(2, MypowRange) + 1, niveles_simulacion)
+
+    for i, nivel in enumerate(resultado):
+        print(f"\nNIVEL {i}")
+        for ruta, valores in sorted(nivel.items()):
+            id_ruta = str(ruta) or "INICIO"
+            print(f"{id_ruta:5} | Len:{len(valores):2} | {valores[:10].tolist()}...")
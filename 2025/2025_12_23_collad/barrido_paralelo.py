@@ -0,0 +1,130 @@
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
+
+import numpy as np
+from profundidad import profundidades_saltos
+from reglas import COLLATZ
+from saltos import TablaSaltos
+
+# Barrido de [1, N] por trozos en varios procesos, con un punto de control por trozo.
+# Cada trozo calcula profundidad y pico (el mayor valor de la trayectoria) de todas
+# sus semillas y escribe un resumen chico en carpeta/trozo_<inicio>_<fin>.json
+# apenas termina. Al reiniciar, los trozos que ya tienen su archivo no se vuelven a
+# correr; el reporte final se arma solo con los resúmenes y es exacto: histogramas
+# sumados, máximos con el desempate por la semilla menor y récords encadenados en orden.
+# Las profundidades salen de profundidad.profundidades_saltos; aquí solo se sigue el pico.
+# Un carril deja de seguirse en cuanto baja de su semilla: desde ahí repite la
+# trayectoria de una semilla menor, que ya cuenta para el pico máximo (y gana el
+# desempate), así que "pico" de cada trozo es el máximo sobre esos tramos.
+
+K_SALTOS = 16
+
+def _picos(semillas: np.ndarray, actuales: Optional[np.ndarray] = None) -> np.ndarray:
+    # Mayor valor de cada trayectoria (desde actuales, o desde la semilla) hasta que
+    # baja de su semilla. Los carriles que se saldrían de int64 se apartan y siguen
+    # solos con enteros de Python, como en profundidad.py.
+    actuales = semillas if actuales is None else actuales
+    pico = actuales.copy()
+    indices = np.flatnonzero(actuales > 1)
+    valores = actuales[indices]
+    apartados = []
+    while len(indices):
+        if COLLATZ.desborda(valores):
+            grandes = COLLATZ.desbordados(valores)
+            apartados.append((indices[grandes], valores[grandes].astype(object)))
+            indices, valores = indices[~grandes], valores[~grandes]
+        valores = COLLATZ.siguiente_vectorizado(valores)
+        pico[indices] = np.maximum(pico[indices], valores)
+        siguen = valores >= semillas[indices]
+        if not siguen.all():
+            indices, valores = indices[siguen], valores[siguen]
+    for carriles, valores in apartados:
+        picos = _picos(semillas[carriles], valores)
+        if pico.dtype != object:
+            pico = pico.astype(object)
+        pico[carriles] = np.maximum(pico[carriles], picos)
+    return pico
+
+def archivo_trozo(carpeta: str, inicio: int, fin: int) -> str:
+    return os.path.join(carpeta, f"trozo_{inicio}_{fin}.json")
+
+def resumir_trozo(inicio: int, fin: int, carpeta: str) -> dict:
+    # Resumen de las semillas [inicio, fin); queda escrito antes de devolverlo
+    semillas = np.arange(inicio, fin, dtype=np.int64)
+    profundidad = profundidades_saltos(semillas, TablaSaltos(K_SALTOS))
+    pico = _picos(semillas)
+    maximo = int(profundidad.argmax())
+    mayor_pico = int(np.argmax(pico)) if pico.dtype != object else max(range(len(pico)), key=lambda i: (pico[i], -i))
+    # Récords locales: semillas más profundas que todas las anteriores del trozo
+    anteriores = np.maximum.accumulate(profundidad)
+    es_record = np.ones(len(profundidad), dtype=bool)
+    es_record[1:] = profundidad[1:] > anteriores[:-1]
+    resumen = {
+        "inicio": inicio,
+        "fin": fin,
+        "profundidad": int(profundidad[maximo]),
+        "culpable": int(semillas[maximo]),
+        "histograma": np.bincount(profundidad).tolist(),
+        "records": [[int(s), int(p)] for s, p in zip(semillas[es_record], profundidad[es_record])],
+        "pico": int(pico[mayor_pico]),
+        "semilla_pico": int(semillas[mayor_pico]),
+    }
+    archivo = archivo_trozo(carpeta, inicio, fin)
+    temporal = archivo + ".tmp"
+    with open(temporal, "w") as f:
+        json.dump(resumen, f)
+    os.replace(temporal, archivo)
+    return resumen
+
+def unir_resumenes(resumenes: list[dict]) -> dict:
+    total = {"profundidad": -1, "culpable": None, "histograma": [], "records": [], "pico": 0, "semilla_pico": None}
+    for resumen in sorted(resumenes, key=lambda r: r["inicio"]):
+        # Estrictamente mayor: ante un empate gana la semilla menor (la de un trozo anterior)
+        if resumen["profundidad"] > total["profundidad"]:
+            total["profundidad"], total["culpable"] = resumen["profundidad"], resumen["culpable"]
+        if resumen["pico"] > total["pico"]:
+            total["pico"], total["semilla_pico"] = resumen["pico"], resumen["semilla_pico"]
+        histograma = total["histograma"]
+        histograma.extend([0] * (len(resumen["histograma"]) - len(histograma)))
+        for nivel, cantidad in enumerate(resumen["histograma"]):
+            histograma[nivel] += cantidad
+        for semilla, profundidad in resumen["records"]:
+            if not total["records"] or profundidad > total["records"][-1][1]:
+                total["records"].append([semilla, profundidad])
+    return total
+
+def barrer(N: int, trozo: int = 1 << 22, procesos: int = None, carpeta: str = None) -> dict:
+    # Resumen de las semillas 1..N. Los trozos ya guardados en carpeta se leen del disco.
+    carpeta = carpeta or f"barrido_{N}"
+    os.makedirs(carpeta, exist_ok=True)
+    resumenes = []
+    pendientes = []
+    for inicio in range(1, N + 1, trozo):
+        fin = min(inicio + trozo, N + 1)
+        archivo = archivo_trozo(carpeta, inicio, fin)
+        if os.path.exists(archivo):
+            with open(archivo) as f:
+                resumenes.append(json.load(f))
+        else:
+            pendientes.append((inicio, fin))
+    if pendientes:
+        print(f"Trozos guardados: {len(resumenes)} | Trozos por calcular: {len(pendientes)}")
+        with ProcessPoolExecutor(max_workers=procesos or os.cpu_count()) as pool:
+            tareas = [pool.submit(resumir_trozo, inicio, fin, carpeta) for inicio, fin in pendientes]
+            for q1, tarea in enumerate(as_completed(tareas), start=1):
+                resumenes.append(tarea.result())
+                print(f"Trozo {q1}/{len(pendientes)} listo")
+    return unir_resumenes(resumenes)
+
+if __name__ == "__main__":
+    MypowRange = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    myrange = pow(2, MypowRange)
+    resultado = barrer(myrange)
+    print("-" * 60)
+    print(f"LA PROFUNDIDAD DEL UNIVERSO (1-{myrange}) ES: {resultado['profundidad']} NIVELES")
+    print(f"La última semilla en colapsar fue la: {resultado['culpable']}")
+    print(f"Pico máximo: {resultado['pico']} (semilla {resultado['semilla_pico']})")
+    print("Récords de profundidad: " + ", ".join(f"{s}:{p}" for s, p in resultado["records"]))
@@ -0,0 +1,178 @@
+from typing import NamedTuple
+
+import numpy as np
+from arbol_numpy import valores_iniciales
+from paso_hibrido import como_arreglo
+from reglas import COLLATZ, paso_carriles
+
+# Detección de ciclos por carril con el algoritmo de Brent, para todas las semillas
+# a la vez. Con semillas negativas las trayectorias caen en los ciclos conocidos
+# (-1, -5, -17) y con reglas como 5n+1 algunas divergen, así que un barrido que
+# solo espera llegar al 1 no termina nunca.
+# Cada carril se retira en cuanto se clasifica: el arreglo activo se compacta y
+# solo los carriles sin clasificar siguen pagando pasos.
+
+SIN_CLASIFICAR = 0  # longitud de los carriles que superaron max_pasos o limite
+
+class ResultadoCiclos(NamedTuple):
+    ciclo: np.ndarray     # elemento de menor |valor| del ciclo (identifica el ciclo)
+    entrada: np.ndarray   # pasos hasta el primer elemento del ciclo, -1 si no se clasificó
+    longitud: np.ndarray  # largo del ciclo, SIN_CLASIFICAR si no se clasificó
+
+def _avanzar(valores, mascara, regla):
+    # Un paso solo en los carriles de la máscara (promoviendo a object si hace falta)
+    nuevos = paso_carriles(valores[mascara], regla)
+    if nuevos.dtype == object and valores.dtype != object:
+        valores = valores.astype(object)
+    valores[mascara] = nuevos
+    return valores
+
+def clasificar(semillas, longitud, regla):
+    # Con la longitud de Brent ya conocida: entrada (mu) e identificador del ciclo
+    liebre = semillas.copy()
+    for q1 in range(int(longitud.max())):
+        liebre = _avanzar(liebre, longitud > q1, regla)
+    tortuga = semillas.copy()
+    if liebre.dtype == object:
+        tortuga = tortuga.astype(object)
+    # Tortuga y liebre avanzan juntas hasta coincidir; los que coinciden se retiran
+    entrada = np.zeros(len(semillas), dtype=np.int64)
+    inicio_ciclo = tortuga.copy()
+    indices = np.arange(len(semillas), dtype=np.int64)
+    pasos = 0
+    while len(indices):
+        iguales = tortuga == liebre
+        entrada[indices[iguales]] = pasos
+        inicio_ciclo[indices[iguales]] = tortuga[iguales]
+        indices, tortuga, liebre = indices[~iguales], tortuga[~iguales], liebre[~iguales]
+        tortuga = paso_carriles(tortuga, regla)
+        liebre = paso_carriles(liebre, regla)
+        if tortuga.dtype == object or liebre.dtype == object:
+            tortuga, liebre = tortuga.astype(object), liebre.astype(object)
+            inicio_ciclo = inicio_ciclo.astype(object)
+        pasos += 1
+    tortuga = inicio_ciclo
+    # Recorre una vuelta del ciclo desde la entrada buscando el menor |valor|
+    ciclo = tortuga.copy()
+    actual = tortuga
+    for q1 in range(int(longitud.max()) - 1):
+        actual = _avanzar(actual, longitud - 1 > q1, regla)
+        if actual.dtype == object and ciclo.dtype != object:
+            ciclo = ciclo.astype(object)
+        menor = (np.abs(actual) < np.abs(ciclo)) | ((np.abs(actual) == np.abs(ciclo)) & (actual < ciclo))
+        ciclo[menor] = actual[menor]
+    return ciclo, entrada
+
+class BrentCarriles:
+    # Estado de Brent para un bucle que ya avanza sus propios valores (los barridos
+    # de profundidad.py): el valor actual hace de liebre y solo se guarda la tortuga.
+    # Todos los carriles arrancan en el mismo paso, así que potencia y lam son los
+    # mismos para todos: por paso cuesta una comparación, y la tortuga se copia solo
+    # en los pasos potencia de 2. cerrados() se llama después de cada paso.
+    # Con espera > 0 la tortuga recién se toma después de esa cantidad de pasos: los
+    # carriles que llegan antes al objetivo no pagan nada y el largo sigue siendo exacto.
+    def __init__(self, valores, espera=0):
+        self.espera = espera
+        self.tortuga = valores.copy() if espera == 0 else None
+        self.potencia = 1
+        self.lam = 0
+        self.largo = 0
+
+    def cerrados(self, valores):
+        # Máscara de los carriles cuyo ciclo se cerró; su largo queda en self.largo
+        if self.tortuga is None:
+            self.espera -= 1
+            if self.espera <= 0:
+                self.tortuga = valores.copy()
+            return np.zeros(len(valores), dtype=bool)
+        self.lam += 1
+        self.largo = self.lam
+        if valores.dtype == object and self.tortuga.dtype != object:
+            self.tortuga = self.tortuga.astype(object)
+        cerrados = self.tortuga == valores
+        if self.potencia == self.lam:
+            self.tortuga = valores.copy()
+            self.potencia *= 2
+            self.lam = 0
+        return cerrados
+
+    def filtrar(self, mascara):
+        if self.tortuga is not None:
+            self.tortuga = self.tortuga[mascara]
+
+def _clasificar_lote(pendientes, semillas, ciclo, entrada, longitud, regla):
+    if not pendientes:
+        return ciclo
+    indices = np.concatenate(pendientes)
+    pendientes.clear()
+    ciclos_cerrados, entrada[indices] = clasificar(semillas[indices], longitud[indices], regla)
+    if ciclos_cerrados.dtype == object and ciclo.dtype != object:
+        ciclo = ciclo.astype(object)
+    ciclo[indices] = ciclos_cerrados
+    return ciclo
+
+def detectar_ciclos(semillas, regla=COLLATZ, max_pasos=1 << 16, limite=1 << 128, lote=1 << 16):
+    # Un carril que pasa de max_pasos sin cerrar su ciclo, o cuyo |valor| supera
+    # limite, queda SIN_CLASIFICAR (probablemente diverge)
+    semillas = como_arreglo(valores_iniciales(semillas))
+    total = len(semillas)
+    ciclo = np.zeros(total, dtype=semillas.dtype)
+    entrada = np.full(total, -1, dtype=np.int64)
+    longitud = np.full(total, SIN_CLASIFICAR, dtype=np.int64)
+
+    carriles = np.arange(total, dtype=np.int64)
+    tortuga = semillas.copy()
+    liebre = paso_carriles(semillas, regla)
+    if liebre.dtype == object:
+        tortuga = tortuga.astype(object)
+    potencia = np.ones(total, dtype=np.int64)
+    lam = np.ones(total, dtype=np.int64)
+    pasos = 1
+    # Los carriles cerrados esperan en pendientes y se clasifican por lotes
+    pendientes = []
+    cantidad_pendiente = 0
+    while len(carriles):
+        cerrados = tortuga == liebre
+        if cerrados.any():
+            longitud[carriles[cerrados]] = lam[cerrados]
+            pendientes.append(carriles[cerrados])
+            cantidad_pendiente += int(cerrados.sum())
+            if cantidad_pendiente >= lote:
+                ciclo = _clasificar_lote(pendientes, semillas, ciclo, entrada, longitud, regla)
+                cantidad_pendiente = 0
+        activos = ~cerrados
+        if limite is not None:
+            activos &= np.abs(liebre) <= limite
+        if pasos >= max_pasos:
+            break
+        if not activos.all():
+            # Compactación: los carriles clasificados (o abandonados) salen del arreglo
+            carriles, tortuga, liebre = carriles[activos], tortuga[activos], liebre[activos]
+            potencia, lam = potencia[activos], lam[activos]
+        reinicio = potencia == lam
+        tortuga[reinicio] = liebre[reinicio]
+        potencia[reinicio] *= 2
+        lam[reinicio] = 0
+        liebre = paso_carriles(liebre, regla)
+        if liebre.dtype == object and tortuga.dtype != object:
+            tortuga = tortuga.astype(object)
+        lam += 1
+        pasos += 1
+    ciclo = _clasificar_lote(pendientes, semillas, ciclo, entrada, longitud, regla)
+    return ResultadoCiclos(ciclo, entrada, longitud)
+
+def resumen_ciclos(resultado):
+    # {identificador: (semillas que caen en él, longitud)}; los no clasificados van en None
+    resumen = {}
+    for identificador, longitud in zip(resultado.ciclo.tolist(), resultado.longitud.tolist()):
+        clave = None if longitud == SIN_CLASIFICAR else identificador
+        cantidad, _ = resumen.get(clave, (0, longitud))
+        resumen[clave] = (cantidad + 1, longitud)
+    return resumen
+
+if __name__ == "__main__":
+    MypowRange = 20
+    resultado = detectar_ciclos(np.arange(-pow(2, MypowRange), 0, dtype=np.int64))
+    for identificador, (cantidad, longitud) in sorted(resumen_ciclos(resultado).items(), key=lambda x: -x[1][0]):
+        print(f"Ciclo {identificador!s:>6} | Largo {longitud:3} | Semillas {cantidad}")
+    print(f"Entrada más larga: {resultado.entrada.max()} pasos")
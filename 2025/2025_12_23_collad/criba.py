@@ -0,0 +1,108 @@
+import os
+import sys
+from typing import NamedTuple
+
+import numpy as np
+from paso_hibrido import LIMITE_SUPERIOR_IMPAR, MAXIMO_INT64
+
+# Criba de residuos mod 2^k para el mapa acortado T (n/2, (3n+1)/2).
+# Todos los n ≡ r (mod 2^j) comparten sus primeros j pasos de paridad y cumplen
+#     T^j(n) = (3^c * n + e) / 2^j
+# con c pasos impares. En cuanto 3^c < 2^j, T^j(n) < n para todo n > e / (2^j - 3^c),
+# así que esa clase de residuos desciende sin simular nada. Las clases que no bajan
+# en k pasos son las sobrevivientes; solo esas semillas (y las menores que umbral)
+# hace falta simular para saber si todas descienden.
+
+class Criba(NamedTuple):
+    k: int
+    residuos: np.ndarray  # residuos sobrevivientes mod 2^k, ordenados
+    umbral: int           # debajo de este valor la criba no garantiza nada
+
+def construir_criba(k):
+    # Recorre las clases bit a bit: cada clase mod 2^j que sigue viva se parte en
+    # dos clases mod 2^(j+1) según el bit j, que decide la paridad de T^j(n)
+    residuos = np.zeros(1, dtype=np.int64)
+    valores = np.zeros(1, dtype=np.int64)      # T^j(r)
+    impares = np.zeros(1, dtype=np.int64)      # c
+    potencias = np.ones(1, dtype=np.int64)     # 3^c
+    constantes = np.zeros(1, dtype=np.int64)   # e
+    umbral = 0
+    for j in range(k):
+        # n = r + 2^j * t  ->  T^j(n) = T^j(r) + 3^c * t
+        residuos = np.concatenate([residuos, residuos + (1 << j)])
+        valores = np.concatenate([valores, valores + potencias])
+        impares = np.concatenate([impares, impares])
+        potencias = np.concatenate([potencias, potencias])
+        constantes = np.concatenate([constantes, constantes])
+        es_impar = (valores & 1) == 1
+        if (valores[es_impar].max(initial=0) > (MAXIMO_INT64 - 1) // 3
+                or potencias.max() > MAXIMO_INT64 // 3 or constantes.max() > (MAXIMO_INT64 >> 1) // 3):
+            raise OverflowError(f"La criba mod 2^{k} no cabe en int64")
+        valores = np.where(es_impar, (3 * valores + 1) >> 1, valores >> 1)
+        constantes = np.where(es_impar, 3 * constantes + (1 << j), constantes)
+        impares += es_impar
+        potencias = np.where(es_impar, potencias * 3, potencias)
+        bajan = potencias < (1 << (j + 1))
+        if bajan.any():
+            umbral = max(umbral, int((constantes[bajan] // ((1 << (j + 1)) - potencias[bajan])).max()))
+            quedan = ~bajan
+            residuos, valores, impares = residuos[quedan], valores[quedan], impares[quedan]
+            potencias, constantes = potencias[quedan], constantes[quedan]
+    return Criba(k, np.sort(residuos), umbral + 1)
+
+def cargar_criba(k, carpeta="."):
+    # La criba se calcula una vez y queda en criba_<k>.npz
+    archivo = os.path.join(carpeta, f"criba_{k}.npz")
+    if os.path.exists(archivo):
+        datos = np.load(archivo)
+        return Criba(k, datos["residuos"], int(datos["umbral"]))
+    criba = construir_criba(k)
+    temporal = archivo + ".tmp.npz"
+    np.savez(temporal, residuos=criba.residuos, umbral=np.int64(criba.umbral))
+    os.replace(temporal, archivo)
+    return criba
+
+def semillas_a_simular(inicio, fin, criba):
+    # Bloques de semillas de [inicio, fin) que la criba no descarta: las de residuo
+    # sobreviviente y todas las menores que el umbral
+    if inicio < criba.umbral:
+        yield np.arange(inicio, min(fin, criba.umbral), dtype=np.int64)
+        inicio = criba.umbral
+    modulo = 1 << criba.k
+    base = inicio - inicio % modulo
+    while base < fin:
+        # Solo el tramo de residuos que cae en [inicio, fin) dentro de este período
+        desde = np.searchsorted(criba.residuos, max(inicio - base, 0))
+        hasta = np.searchsorted(criba.residuos, min(fin - base, modulo))
+        residuos = criba.residuos[desde:hasta]
+        if base + modulo > MAXIMO_INT64:
+            residuos = residuos.astype(object)
+        yield base + residuos
+        base += modulo
+
+def verificar_descenso(inicio, fin, criba, max_pasos=1 << 16):
+    # Comprueba que toda semilla de [inicio, fin), inicio >= 2, baja de su valor
+    # inicial. Devuelve (semillas simuladas, semillas que no bajaron en max_pasos).
+    simuladas = 0
+    fallidas = []
+    for semillas in semillas_a_simular(max(inicio, 2), fin, criba):
+        simuladas += len(semillas)
+        valores = semillas.copy()
+        for _ in range(max_pasos):
+            if not len(semillas):
+                break
+            if valores.dtype != object and valores.max() > LIMITE_SUPERIOR_IMPAR:
+                valores = valores.astype(object)
+            valores = np.where(valores % 2 == 1, (3 * valores + 1) // 2, valores // 2)
+            siguen = valores >= semillas
+            semillas, valores = semillas[siguen], valores[siguen]
+        fallidas.extend(semillas.tolist())
+    return simuladas, fallidas
+
+if __name__ == "__main__":
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    MypowRange = int(sys.argv[2]) if len(sys.argv) > 2 else 26
+    criba = cargar_criba(k)
+    print(f"Criba mod 2^{k}: {len(criba.residuos)} residuos sobrevivientes ({len(criba.residuos) / 2**k * 100:.3f}%), umbral {criba.umbral}")
+    simuladas, fallidas = verificar_descenso(1, pow(2, MypowRange) + 1, criba)
+    print(f"Semillas simuladas: {simuladas} de {pow(2, MypowRange)} | Sin descenso: {fallidas}")
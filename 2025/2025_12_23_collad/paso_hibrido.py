@@ -0,0 +1,127 @@
+import numpy as np
+
+# Paso de Collatz vectorizado que no se desborda.
+# Los valores viven en int64 mientras 3n+1 quepa; los elementos que se saldrían
+# del rango pasan (solo ellos) a enteros de Python dentro de un arreglo object.
+
+MAXIMO_INT64 = int(np.iinfo(np.int64).max)
+MINIMO_INT64 = int(np.iinfo(np.int64).min)
+# 3n+1 cabe en int64 solo para LIMITE_INFERIOR_IMPAR <= n <= LIMITE_SUPERIOR_IMPAR
+LIMITE_SUPERIOR_IMPAR = (MAXIMO_INT64 - 1) // 3
+LIMITE_INFERIOR_IMPAR = -((1 - MINIMO_INT64) // 3)
+
+def desborde_impar(impares):
+    # Máscara de los impares cuyo 3n+1 no cabe en int64
+    return (impares > LIMITE_SUPERIOR_IMPAR) | (impares < LIMITE_INFERIOR_IMPAR)
+
+def _cabe_en_int64(valores):
+    if len(valores) == 0:
+        return np.zeros(0, dtype=bool)
+    return np.array([MINIMO_INT64 <= v <= MAXIMO_INT64 for v in valores], dtype=bool)
+
+class ArregloHibrido:
+    # rapido: valores int64; lento: enteros de Python (dtype object).
+    # Las posiciones indican el orden original de cada elemento; solo existen
+    # mientras haya elementos en lento.
+    def __init__(self, rapido, lento=None, pos_rapido=None, pos_lento=None):
+        self.rapido = rapido
+        self.lento = lento if lento is not None else np.zeros(0, dtype=object)
+        self.pos_rapido = pos_rapido
+        self.pos_lento = pos_lento
+        self._normalizar()
+
+    @classmethod
+    def desde(cls, valores):
+        valores = np.asarray(valores)
+        if valores.dtype != object:
+            return cls(valores.astype(np.int64, copy=False))
+        cabe = _cabe_en_int64(valores)
+        posiciones = np.arange(len(valores), dtype=np.int64)
+        return cls(valores[cabe].astype(np.int64), valores[~cabe],
+                   posiciones[cabe], posiciones[~cabe])
+
+    def _normalizar(self):
+        # Sin elementos lentos se vuelve a un int64 ordenado y sin posiciones
+        if len(self.lento) == 0 and self.pos_rapido is not None:
+            self.rapido = self.rapido[np.argsort(self.pos_rapido, kind="stable")]
+            self.pos_rapido = None
+            self.pos_lento = None
+
+    @property
+    def es_rapido(self):
+        return len(self.lento) == 0
+
+    def __len__(self):
+        return len(self.rapido) + len(self.lento)
+
+    def _posiciones(self):
+        if self.pos_rapido is None:
+            return np.arange(len(self.rapido), dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return self.pos_rapido, self.pos_lento
+
+    def paso(self):
+        # Divide como collatz(): devuelve (grupo R, grupo L), ambos ArregloHibrido
+        pos_rapido, pos_lento = self._posiciones()
+
+        pares = (self.rapido & 1) == 0
+        impares = self.rapido[~pares]
+        desborde = desborde_impar(impares)
+        r_rapido = self.rapido[pares] >> 1
+        l_rapido = impares[~desborde] * 3 + 1
+        l_promovidos = impares[desborde].astype(object) * 3 + 1
+
+        pares_lento = np.array([v % 2 == 0 for v in self.lento], dtype=bool)
+        r_lento = self.lento[pares_lento] // 2
+        l_lento = self.lento[~pares_lento] * 3 + 1
+        # Los pares lentos que al dividirse vuelven a caber regresan a int64
+        cabe = _cabe_en_int64(r_lento)
+
+        if len(l_promovidos) == 0 and len(self.lento) == 0:
+            return ArregloHibrido(r_rapido), ArregloHibrido(l_rapido)
+
+        pos_impares = pos_rapido[~pares]
+        pos_lento_pares = pos_lento[pares_lento]
+        grupo_r = ArregloHibrido(
+            np.concatenate([r_rapido, r_lento[cabe].astype(np.int64)]),
+            r_lento[~cabe],
+            np.concatenate([pos_rapido[pares], pos_lento_pares[cabe]]),
+            pos_lento_pares[~cabe])
+        grupo_l = ArregloHibrido(
+            l_rapido,
+            np.concatenate([l_promovidos, l_lento]),
+            pos_impares[~desborde],
+            np.concatenate([pos_impares[desborde], pos_lento[~pares_lento]]))
+        return grupo_r, grupo_l
+
+    def como_arreglo(self):
+        # int64 si todo es rápido; si no, un arreglo object en el orden original
+        if self.es_rapido:
+            return self.rapido
+        salida = np.empty(len(self), dtype=object)
+        orden = np.argsort(np.concatenate([self.pos_rapido, self.pos_lento]), kind="stable")
+        valores = np.concatenate([self.rapido.astype(object), self.lento])
+        salida[:] = valores[orden]
+        return salida
+
+    def __getitem__(self, indice):
+        return self.como_arreglo()[indice]
+
+    def __iter__(self):
+        return iter(self.como_arreglo())
+
+    def tolist(self):
+        return self.como_arreglo().tolist()
+
+    def __repr__(self):
+        return f"ArregloHibrido({self.tolist()!r})"
+
+def simplificar(valores):
+    # Devuelve un int64 simple cuando no quedan elementos lentos
+    if isinstance(valores, ArregloHibrido) and valores.es_rapido:
+        return valores.rapido
+    return valores
+
+def como_arreglo(valores):
+    if isinstance(valores, ArregloHibrido):
+        return valores.como_arreglo()
+    return np.asarray(valores)
@@ -0,0 +1,284 @@
+import json
+import os
+import sqlite3
+import tempfile
+import weakref
+from typing import Callable, NamedTuple, Optional, Sequence
+
+import numpy as np
+from paso_hibrido import ArregloHibrido, como_arreglo
+from ruta_codigo import Ruta
+
+# Detector único de progresiones aritméticas para todas las variantes de detectar_patron.
+# Trabaja sobre arreglos (diferencias y comparación), corta en cuanto encuentra un
+# salto distinto y devuelve un resultado estructurado en vez de un texto.
+
+MUY_CORTO = "muyCorto"
+NO_SIMPLE = "NoSimple"
+
+class Patron(NamedTuple):
+    desplazamiento: Optional[int]
+    progresion: Optional[int]
+    motivo: Optional[str] = None  # None si es una progresión; si no MUY_CORTO o NO_SIMPLE
+
+    @property
+    def es_simple(self) -> bool:
+        return self.motivo is None
+
+    def tupla(self) -> tuple[int, int]:
+        return (self.desplazamiento, self.progresion)
+
+def _arreglo(valores: Sequence[int]) -> np.ndarray:
+    arreglo = como_arreglo(valores)
+    if arreglo.dtype == object:
+        return arreglo
+    if arreglo.dtype.kind == "u":
+        # Una lista con enteros entre 2**63 y 2**64 llega como uint64
+        return arreglo.astype(object)
+    arreglo = arreglo.astype(np.int64, copy=False)
+    # Las diferencias de valores cercanos a los límites de int64 podrían desbordarse
+    if len(arreglo) and (arreglo.max() > 2**62 or arreglo.min() < -2**62):
+        return arreglo.astype(object)
+    return arreglo
+
+def detectar_progresion(valores: Sequence[int], minimo: int = 3, muestra: Optional[int] = None) -> Patron:
+    if muestra is not None:
+        valores = valores[:muestra]
+    if len(valores) < minimo:
+        return Patron(None, None, MUY_CORTO)
+    arreglo = _arreglo(valores)
+    salto = arreglo[1] - arreglo[0]
+    # Bloques crecientes: una serie rota se descubre sin recorrerla entera
+    inicio, bloque = 1, 64
+    while inicio < len(arreglo):
+        fin = min(len(arreglo), inicio + bloque)
+        if not (np.diff(arreglo[inicio - 1:fin]) == salto).all():
+            return Patron(None, None, NO_SIMPLE)
+        inicio, bloque = fin, bloque * 4
+    return Patron(int(arreglo[0]), int(salto))
+
+def detectar_patrones_nivel(nivel: dict[Ruta, Sequence[int]], minimo: int = 3, muestra: Optional[int] = 100) -> dict:
+    # Todos los nodos de un nivel en una sola llamada. Los nodos int64 con la misma
+    # cantidad de valores analizados se apilan en una matriz y se comparan juntos.
+    resultado = {}
+    grupos = {}
+    for ruta, valores in nivel.items():
+        cantidad = len(valores) if muestra is None else min(len(valores), muestra)
+        if cantidad < minimo:
+            resultado[ruta] = Patron(None, None, MUY_CORTO)
+        elif isinstance(valores, ArregloHibrido) or np.asarray(valores[:1]).dtype == object:
+            resultado[ruta] = detectar_progresion(valores, minimo, muestra)
+        else:
+            resultado[ruta] = None  # reserva el lugar para conservar el orden del nivel
+            grupos.setdefault(cantidad, []).append(ruta)
+    for cantidad, rutas in grupos.items():
+        try:
+            matriz = np.stack([np.asarray(nivel[ruta][:cantidad], dtype=np.int64) for ruta in rutas])
+        except OverflowError:
+            matriz = None
+        if matriz is None or matriz.max() > 2**62 or matriz.min() < -2**62:
+            for ruta in rutas:
+                resultado[ruta] = detectar_progresion(nivel[ruta], minimo, muestra)
+            continue
+        diferencias = np.diff(matriz, axis=1)
+        simples = (diferencias == diferencias[:, :1]).all(axis=1)
+        for fila, ruta in enumerate(rutas):
+            if simples[fila]:
+                resultado[ruta] = Patron(int(matriz[fila, 0]), int(diferencias[fila, 0]))
+            else:
+                resultado[ruta] = Patron(None, None, NO_SIMPLE)
+    return resultado
+
+def formatear_patron(patron: Patron) -> str:
+    # Mismo texto que imprimían los scripts: "(>inicio n salto)", "!!!!!!!" o ""
+    if patron.es_simple:
+        return f"(>{patron.desplazamiento}n{patron.progresion})"
+    if patron.motivo == MUY_CORTO:
+        return ""
+    return "!!!!!!!"
+
+def detectar_patron(valores: Sequence[int]) -> str:
+    return formatear_patron(detectar_progresion(valores))
+
+class IndicePatrones:
+    # Índice global de patrones: (desplazamiento, progresion) -> (nivel, ruta) donde
+    # apareció por primera vez (o cualquier otra clave de enteros, como la
+    # (desplazamiento, exp2, exp3) de nodo_collatz). Reemplaza las huellas tuple(valores[:5]) y los dicts
+    # por texto: dos progresiones distintas nunca comparten clave.
+    # Con archivo, el índice se carga al crearse y guardar() lo escribe, así que una
+    # corrida más profunda reutiliza lo que dejó una más corta. origen (script, semillas,
+    # mapa) se guarda junto a los patrones: un índice de otro árbol marcaría mal los
+    # duplicados, así que si no coincide no se carga y se lanza ValueError.
+    def __init__(self, archivo: Optional[str] = None, origen: Optional[dict] = None):
+        self.archivo = archivo
+        self.origen = origen
+        self.primeros: dict[tuple[int, ...], tuple[int, Ruta]] = {}
+        if archivo is not None and os.path.exists(archivo):
+            self.cargar(archivo)
+
+    @classmethod
+    def para_script(cls, script: str, semillas: Sequence[int], paso: Callable[[int], tuple[int, str]]) -> "IndicePatrones":
+        # Índice en disco de un script (3.py, 5.py, ...): uno por script y rango de
+        # semillas, con una muestra del mapa paso(n) para notar si se cambió
+        nombre = os.path.splitext(os.path.basename(script))[0]
+        origen = {"script": nombre, "semillas": [semillas[0], semillas[-1], len(semillas)],
+                  "mapa": [paso(n)[0] for n in range(1, 9)]}
+        return cls(f"indice_patrones_{nombre.replace(' ', '_')}_{semillas[0]}_{semillas[-1]}.json", origen)
+
+    def __contains__(self, clave: tuple[int, ...]) -> bool:
+        return clave in self.primeros
+
+    def __len__(self) -> int:
+        return len(self.primeros)
+
+    def primero(self, clave: tuple[int, ...]) -> Optional[tuple[int, Ruta]]:
+        return self.primeros.get(clave)
+
+    def es_duplicado(self, clave: tuple[int, ...], ruta: Ruta, nivel: int) -> bool:
+        # Registra la clave si es nueva. Un nodo que ya es el primero registrado
+        # (por ejemplo, al repetir una corrida con el índice cargado) no es duplicado.
+        clave = tuple(int(c) for c in clave)
+        registrado = self.primeros.get(clave)
+        if registrado is None or registrado[0] > nivel:
+            self.primeros[clave] = (nivel, Ruta(int(ruta)))
+            return False
+        return registrado != (nivel, ruta)
+
+    def cargar(self, archivo: str):
+        with open(archivo) as f:
+            datos = json.load(f)
+        if self.origen is not None and datos.get("origen") != self.origen:
+            raise ValueError(f"{archivo} es de otro árbol ({datos.get('origen')}, no {self.origen}); "
+                             "bórrelo o use otro archivo")
+        for *clave, nivel, ruta in datos["patrones"]:
+            self.primeros[tuple(clave)] = (nivel, Ruta(ruta))
+
+    def guardar(self, archivo: Optional[str] = None):
+        archivo = archivo or self.archivo
+        temporal = archivo + ".tmp"
+        with open(temporal, "w") as f:
+            json.dump({"origen": self.origen, "patrones": [[*clave, nivel, int(ruta)] for clave, (nivel, ruta) in self.primeros.items()]}, f)
+        os.replace(temporal, archivo)
+
+def _borrar_temporal(base: sqlite3.Connection, archivo: str):
+    base.close()
+    if os.path.exists(archivo):
+        os.remove(archivo)
+
+class IndiceAcotado:
+    # Mismo uso que IndicePatrones, pero con memoria acotada para árboles muy profundos.
+    #   - Un filtro de Bloom de memoria_filtro bytes responde "seguro que es nueva"
+    #     sin ir a la base; es el caso de casi todas las claves que no están en memoria. Las posiciones
+    #     salen de hash() de la tupla (dos mitades, doble hashing).
+    #   - Las claves se guardan exactas: en un dict hasta max_en_memoria entradas y
+    #     después en una tabla sqlite en disco. Solo los aciertos del filtro se
+    #     confirman ahí, así que un falso positivo nunca cambia las marcas #/*.
+    # Sin archivo, la base vive en un temporal que se borra al cerrar (o con with, o
+    # cuando el índice deja de usarse).
+    def __init__(self, archivo: Optional[str] = None, memoria_filtro: int = 1 << 24, max_en_memoria: int = 1 << 20, hashes: int = 7):
+        self.temporal = archivo is None
+        if archivo is None:
+            descriptor, archivo = tempfile.mkstemp(suffix=".sqlite")
+            os.close(descriptor)
+        self.archivo = archivo
+        self.bits = bytearray(memoria_filtro)
+        self.total_bits = memoria_filtro * 8
+        self.hashes = hashes
+        self.max_en_memoria = max_en_memoria
+        self.recientes: dict[tuple[int, ...], tuple[int, Ruta]] = {}
+        self.cantidad = 0
+        self.base = sqlite3.connect(archivo)
+        self._borrar = weakref.finalize(self, _borrar_temporal, self.base, archivo) if self.temporal else None
+        self.base.execute("CREATE TABLE IF NOT EXISTS patrones (clave TEXT PRIMARY KEY, nivel INTEGER, ruta TEXT)")
+        for (texto,) in self.base.execute("SELECT clave FROM patrones"):
+            self._marcar(tuple(int(c) for c in texto.split(",")))
+            self.cantidad += 1
+
+    def __enter__(self) -> "IndiceAcotado":
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+    @staticmethod
+    def _texto(clave: tuple[int, ...]) -> str:
+        return ",".join(str(int(c)) for c in clave)
+
+    def _posiciones(self, clave: tuple[int, ...]) -> list[int]:
+        resumen = hash(clave)
+        h1 = (resumen & 0xFFFFFFFF) % self.total_bits
+        h2 = ((resumen >> 32) & 0xFFFFFFFF) % self.total_bits | 1
+        posiciones = [h1]
+        for _ in range(self.hashes - 1):
+            h1 += h2
+            if h1 >= self.total_bits:
+                h1 -= self.total_bits
+            posiciones.append(h1)
+        return posiciones
+
+    def _marcar(self, clave: tuple[int, ...]):
+        for posicion in self._posiciones(clave):
+            self.bits[posicion >> 3] |= 1 << (posicion & 7)
+
+    def _quizas(self, clave: tuple[int, ...]) -> bool:
+        bits = self.bits
+        for posicion in self._posiciones(clave):
+            if not bits[posicion >> 3] & (1 << (posicion & 7)):
+                return False
+        return True
+
+    def _buscar(self, clave: tuple[int, ...]) -> Optional[tuple[int, Ruta]]:
+        # Las entradas en memoria no pasan por el filtro; el resto solo va a la base
+        # si el filtro no descarta la clave
+        registrado = self.recientes.get(clave)
+        if registrado is not None or not self._quizas(clave):
+            return registrado
+        fila = self.base.execute("SELECT nivel, ruta FROM patrones WHERE clave = ?", (self._texto(clave),)).fetchone()
+        if fila is None:
+            return None
+        return (fila[0], Ruta(int(fila[1])))
+
+    def _registrar(self, clave: tuple[int, ...], nivel: int, ruta: Ruta):
+        self.recientes[clave] = (nivel, Ruta(int(ruta)))
+        if len(self.recientes) >= self.max_en_memoria:
+            self.volcar()
+
+    def volcar(self):
+        # Pasa las entradas en memoria a la base
+        self.base.executemany("INSERT OR REPLACE INTO patrones VALUES (?, ?, ?)",
+                              ((self._texto(clave), nivel, str(int(ruta))) for clave, (nivel, ruta) in self.recientes.items()))
+        self.base.commit()
+        self.recientes.clear()
+
+    def __contains__(self, clave: tuple[int, ...]) -> bool:
+        return self.primero(clave) is not None
+
+    def __len__(self) -> int:
+        return self.cantidad
+
+    def primero(self, clave: tuple[int, ...]) -> Optional[tuple[int, Ruta]]:
+        return self._buscar(tuple(int(c) for c in clave))
+
+    def es_duplicado(self, clave: tuple[int, ...], ruta: Ruta, nivel: int) -> bool:
+        # Misma regla que IndicePatrones.es_duplicado
+        clave = tuple(int(c) for c in clave)
+        registrado = self._buscar(clave)
+        if registrado is None:
+            self._marcar(clave)
+            self.cantidad += 1
+            self._registrar(clave, nivel, ruta)
+            return False
+        if registrado[0] > nivel:
+            self._registrar(clave, nivel, ruta)
+            return False
+        return registrado != (nivel, ruta)
+
+    def guardar(self):
+        self.volcar()
+
+    def cerrar(self):
+        if self.temporal:
+            self._borrar()
+        else:
+            self.volcar()
+            self.base.close()
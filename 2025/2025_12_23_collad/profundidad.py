@@ -0,0 +1,305 @@
+from functools import lru_cache
+
+import numpy as np
+from arbol_numpy import valores_iniciales
+from ciclos import SIN_CLASIFICAR, BrentCarriles, ResultadoCiclos, clasificar, detectar_ciclos, resumen_ciclos
+from criba import verificar_descenso
+from paso_hibrido import como_arreglo
+from reglas import COLLATZ, paso_carriles
+
+# Profundidad del universo (reemplazo de medir_profundidad_universo de 2.py y 2_1.py).
+# Las semillas vivas se guardan en un arreglo compacto y avanzan todas con un solo
+# paso vectorizado por nivel; las que llegan al objetivo salen del arreglo en ese
+# mismo nivel, así que el trabajo total es la suma de las profundidades y no
+# semillas × profundidad máxima. Las semillas se procesan por bloques para que la
+# memoria no dependa del tamaño del rango.
+# Un carril cuyo próximo paso no cabría en int64 se aparta (solo él) y termina
+# aparte con enteros de Python, en una llamada recursiva sobre esos pocos carriles;
+# el resto del bloque sigue en int64.
+
+def _como_carriles(semillas):
+    # Un arreglo object ya son carriles apartados: siguen con enteros de Python
+    if isinstance(semillas, np.ndarray) and semillas.dtype == object:
+        return semillas
+    return como_arreglo(valores_iniciales(semillas))
+
+ESPERA_BRENT = 1 << 9  # niveles antes de empezar a buscar ciclos (casi todas las positivas ya llegaron)
+
+def profundidades_y_ciclos(semillas, regla=COLLATZ, objetivo=1, max_niveles=1 << 16):
+    # Nivel en que cada semilla llega por primera vez al objetivo (0 si ya es el objetivo).
+    # Después de ESPERA_BRENT niveles cada carril lleva además su estado de Brent: el que
+    # cierra un ciclo sin pasar por el objetivo (las semillas negativas, por ejemplo)
+    # sale del arreglo en ese mismo paso con profundidad -1, y al final se clasifica
+    # con ciclos.clasificar.
+    # Devuelve (profundidad, ResultadoCiclos); en el ResultadoCiclos solo tienen datos
+    # las semillas que cayeron en otro ciclo. Las que pasan max_niveles sin llegar ni
+    # cerrar un ciclo (probablemente divergen) quedan con -1 y SIN_CLASIFICAR.
+    semillas = _como_carriles(semillas)
+    profundidad = np.full(len(semillas), -1, dtype=np.int64)
+    longitud = np.full(len(semillas), SIN_CLASIFICAR, dtype=np.int64)
+    entrada = np.full(len(semillas), -1, dtype=np.int64)
+    ciclo = np.zeros(len(semillas), dtype=semillas.dtype)
+    profundidad[semillas == objetivo] = 0
+    indices = np.flatnonzero(profundidad < 0)
+    valores = semillas[indices]
+    brent = BrentCarriles(valores, ESPERA_BRENT)
+    ciclados = []
+    apartados = []  # (carriles, valores como enteros de Python, nivel)
+    nivel = 0
+    while len(indices) and nivel < max_niveles:
+        if regla.desborda(valores):
+            grandes = regla.desbordados(valores)
+            apartados.append((indices[grandes], valores[grandes].astype(object), nivel))
+            indices, valores = indices[~grandes], valores[~grandes]
+            brent.filtrar(~grandes)
+            continue
+        nivel += 1
+        valores = regla.siguiente_vectorizado(valores)
+        llegaron = valores == objetivo
+        cerrados = brent.cerrados(valores) & ~llegaron
+        if llegaron.any() or cerrados.any():
+            profundidad[indices[llegaron]] = nivel
+            if cerrados.any():
+                longitud[indices[cerrados]] = brent.largo
+                ciclados.append(indices[cerrados])
+            # Compactación: solo siguen las semillas que todavía no se resolvieron
+            siguen = ~(llegaron | cerrados)
+            indices, valores = indices[siguen], valores[siguen]
+            brent.filtrar(siguen)
+    for carriles, valores, nivel in apartados:
+        resto, ciclos = profundidades_y_ciclos(valores, regla, objetivo, max_niveles - nivel)
+        profundidad[carriles] = np.where(resto >= 0, nivel + resto, -1)
+        longitud[carriles] = ciclos.longitud
+        # La entrada y el identificador se recalculan desde la semilla, con los demás
+        cerrados = ciclos.longitud != SIN_CLASIFICAR
+        if cerrados.any():
+            ciclados.append(carriles[cerrados])
+    if ciclados:
+        cerrados = np.concatenate(ciclados)
+        ciclos_cerrados, entrada[cerrados] = clasificar(semillas[cerrados], longitud[cerrados], regla)
+        if ciclos_cerrados.dtype == object:
+            ciclo = ciclo.astype(object)
+        ciclo[cerrados] = ciclos_cerrados
+    return profundidad, ResultadoCiclos(ciclo, entrada, longitud)
+
+def profundidades(semillas, regla=COLLATZ, objetivo=1, max_niveles=1 << 16):
+    # Solo las profundidades (-1 para las semillas que no llegan al objetivo)
+    return profundidades_y_ciclos(semillas, regla, objetivo, max_niveles)[0]
+
+class TablaProfundidad:
+    # Memoria densa de profundidades para 0 <= n < limite (-1 = desconocida).
+    # Cada trayectoria se corta en cuanto toca un valor ya conocido, y los valores
+    # del camino que caen en la tabla se rellenan al final (profundidad de la
+    # semilla menos el nivel en que se los visitó). Llenando por bloques crecientes,
+    # todo lo que está debajo del bloque ya es conocido: cada semilla solo camina
+    # hasta bajar de su inicio y el barrido completo cuesta casi O(N) pasos.
+    def __init__(self, limite, regla=COLLATZ, objetivo=1, max_niveles=1 << 16):
+        if not 0 <= objetivo < limite:
+            raise ValueError(f"El objetivo {objetivo} tiene que caber en la tabla (limite {limite})")
+        self.limite = limite
+        self.regla = regla
+        self.objetivo = objetivo
+        self.max_niveles = max_niveles
+        self.tabla = np.full(limite, -1, dtype=np.int32)
+        self.tabla[objetivo] = 0
+        self.llenado = objetivo + 1  # todos los n del rango [1, llenado) ya son conocidos
+
+    def __getitem__(self, n):
+        # O(1) para n en la tabla ya calculado; si no, camina y rellena
+        if 0 <= n < self.limite and self.tabla[n] >= 0:
+            return int(self.tabla[n])
+        return int(self.profundidades([n])[0])
+
+    def _conocidos(self, valores):
+        # (máscara de valores con profundidad conocida, esas profundidades)
+        en_rango = (valores >= 0) & (valores < self.limite)
+        conocidos = np.zeros(len(valores), dtype=bool)
+        posiciones = valores[en_rango].astype(np.int64)
+        conocidos[en_rango] = self.tabla[posiciones] >= 0
+        return conocidos, en_rango
+
+    def profundidades(self, semillas, bloque=1 << 16):
+        # Por bloques chicos: cada bloque aprovecha lo que rellenaron los anteriores
+        if len(semillas) <= bloque:
+            return self._profundidades_bloque(semillas)
+        return np.concatenate([self._profundidades_bloque(trozo) for trozo in _bloques(semillas, bloque)])
+
+    def _profundidades_bloque(self, semillas):
+        semillas = _como_carriles(semillas)
+        profundidad = np.full(len(semillas), -1, dtype=np.int64)
+        indices = np.arange(len(semillas), dtype=np.int64)
+        valores = semillas
+        historia = []  # (carriles, valores en la tabla, nivel) para rellenar al final
+        apartados = []  # (carriles, valores como enteros de Python, nivel)
+        brent = BrentCarriles(valores, ESPERA_BRENT)
+        nivel = 0
+        while True:
+            conocidos, en_rango = self._conocidos(valores)
+            # Los que cierran un ciclo sin el objetivo quedan con -1, como en profundidades()
+            cerrados = brent.cerrados(valores) & ~conocidos
+            if conocidos.any() or cerrados.any():
+                profundidad[indices[conocidos]] = nivel + self.tabla[valores[conocidos].astype(np.int64)]
+                siguen = ~(conocidos | cerrados)
+                indices, valores, en_rango = indices[siguen], valores[siguen], en_rango[siguen]
+                brent.filtrar(siguen)
+            if not len(indices) or nivel >= self.max_niveles:
+                break
+            historia.append((indices[en_rango], valores[en_rango].astype(np.int64), nivel))
+            if self.regla.desborda(valores):
+                grandes = self.regla.desbordados(valores)
+                apartados.append((indices[grandes], valores[grandes].astype(object), nivel))
+                indices, valores = indices[~grandes], valores[~grandes]
+                brent.filtrar(~grandes)
+            valores = self.regla.siguiente_vectorizado(valores)
+            nivel += 1
+        for carriles, valores, nivel in apartados:
+            resto = profundidades(valores, self.regla, self.objetivo, self.max_niveles - nivel)
+            profundidad[carriles] = np.where(resto >= 0, nivel + resto, -1)
+        for carriles, visitados, nivel in historia:
+            conocida = profundidad[carriles] >= 0
+            self.tabla[visitados[conocida]] = profundidad[carriles[conocida]] - nivel
+        return profundidad
+
+    def llenar(self, hasta=None, bloque=1 << 16):
+        # Completa la tabla para [1, hasta) en bloques crecientes
+        hasta = self.limite if hasta is None else min(hasta, self.limite)
+        if self.llenado < hasta:
+            self.profundidades(range(self.llenado, hasta), bloque)
+        self.llenado = max(self.llenado, hasta)
+
+@lru_cache(maxsize=None)
+def _tabla_exacta(k, regla, objetivo):
+    # Profundidades exactas debajo de 2^k; se llena a medida que se consulta
+    return TablaProfundidad(1 << k, regla, objetivo)
+
+def profundidades_saltos(semillas, saltos, objetivo=1, max_niveles=1 << 16):
+    # Como profundidades(), pero los valores >= 2^k avanzan de a k pasos de T con la
+    # tabla de saltos. Desde n >= 2^k la trayectoria no puede tocar el 1 dentro de un
+    # salto (cada paso de T a lo sumo divide por 2), así que solo cerca del 1 hace
+    # falta ir de a un paso: debajo de 2^k la profundidad sale de una tabla exacta.
+    if objetivo != 1:
+        raise ValueError("Los saltos solo conservan la profundidad exacta con objetivo 1")
+    exacta = _tabla_exacta(saltos.k, saltos.regla, objetivo)
+    semillas = _como_carriles(semillas)
+    profundidad = np.full(len(semillas), -1, dtype=np.int64)
+    indices = np.arange(len(semillas), dtype=np.int64)
+    niveles = np.zeros(len(semillas), dtype=np.int64)  # pasos de collatz(n) ya dados por carril
+    valores = semillas
+    # Brent sobre la sucesión de saltos (o pasos simples): también es determinista,
+    # así que un valor repetido significa que el carril quedó en un ciclo sin el 1
+    brent = BrentCarriles(valores, max(ESPERA_BRENT // saltos.k, 1))
+    apartados = []  # (carriles, valores como enteros de Python, niveles)
+    while len(indices):
+        chicos = (valores >= 0) & (valores < saltos.modulo)
+        # Los que pasan max_niveles se abandonan con -1, como en profundidades()
+        fuera = (niveles >= max_niveles) | brent.cerrados(valores)
+        fuera &= ~chicos
+        if chicos.any() or fuera.any():
+            resto = exacta.profundidades(valores[chicos].astype(np.int64))
+            profundidad[indices[chicos]] = np.where(resto >= 0, niveles[chicos] + resto, -1)
+            siguen = ~(chicos | fuera)
+            indices, valores, niveles = indices[siguen], valores[siguen], niveles[siguen]
+            brent.filtrar(siguen)
+            if not len(indices):
+                break
+        grandes = saltos.desbordados(valores)
+        if grandes.any():
+            apartados.append((indices[grandes], valores[grandes].astype(object), niveles[grandes]))
+            siguen = ~grandes
+            indices, valores, niveles = indices[siguen], valores[siguen], niveles[siguen]
+            brent.filtrar(siguen)
+            if not len(indices):
+                break
+        # Los negativos no se acercan al 1: van de a un paso hasta cerrar su ciclo
+        grandes = valores >= saltos.modulo
+        if grandes.all():
+            valores, pasos = saltos.saltar(valores)
+            niveles += pasos
+        else:
+            nuevos, pasos = saltos.saltar(valores[grandes])
+            otros = paso_carriles(valores[~grandes], saltos.regla)
+            if (nuevos.dtype == object or otros.dtype == object) and valores.dtype != object:
+                valores = valores.astype(object)
+            valores = valores.copy()
+            valores[grandes] = nuevos
+            valores[~grandes] = otros
+            niveles[grandes] += pasos
+            niveles[~grandes] += 1
+    for carriles, valores, niveles in apartados:
+        resto = profundidades_saltos(valores, saltos, objetivo, max_niveles - int(niveles.min()))
+        profundidad[carriles] = np.where(resto >= 0, niveles + resto, -1)
+    return profundidad
+
+def _bloques(semillas, bloque):
+    for inicio in range(0, len(semillas), bloque):
+        yield semillas[inicio:inicio + bloque]
+
+def medir_profundidad_universo(semillas_iniciales, niveles_interes=(), regla=COLLATZ, objetivo=1,
+                               bloque=1 << 22, max_niveles=1 << 16, imprimir=True, tabla=None,
+                               saltos=None, criba=None):
+    # Devuelve (profundidad, culpable, hitos): la profundidad máxima, la última semilla
+    # en llegar (la primera de ellas si empatan) y {nivel: semillas que ya llegaron}
+    # para cada nivel de niveles_interes y para el último. Las semillas que caen en
+    # otro ciclo no cuentan como llegadas; se informan al final, ciclo por ciclo.
+    # Con tabla, cada bloque se resuelve con la memoria de TablaProfundidad; con
+    # saltos (una TablaSaltos de la misma regla), de a k pasos. Con criba (solo para
+    # un range y la regla 3n+1) primero se comprueba que todas las semillas bajan de
+    # su valor inicial simulando únicamente las que la criba no descarta; las
+    # profundidades se siguen calculando completas.
+    if criba is not None:
+        # La criba es del mapa 3n+1 y trabaja sobre intervalos [inicio, fin)
+        if not (isinstance(semillas_iniciales, range) and semillas_iniciales.step == 1):
+            raise ValueError("criba solo acepta semillas_iniciales de tipo range con paso 1")
+        if regla is not COLLATZ:
+            raise ValueError(f"criba solo vale para la regla 3n+1, no para {regla.nombre}")
+    total = len(semillas_iniciales)
+    if imprimir:
+        print(f"Iniciando búsqueda con {total} semillas...")
+        print("-" * 60)
+    if criba is not None:
+        simuladas, fallidas = verificar_descenso(semillas_iniciales.start, semillas_iniciales.stop, criba)
+        if fallidas:
+            raise ValueError(f"{len(fallidas)} semillas no bajan de su valor inicial (la primera es {fallidas[0]})")
+        if imprimir:
+            print(f"Descenso verificado con la criba mod 2^{criba.k}: {simuladas} semillas simuladas de {total}")
+    llegadas = np.zeros(1, dtype=np.int64)  # llegadas[n]: semillas que llegan en el nivel n
+    profundidad_maxima = -1
+    culpable = None
+    otros_ciclos = {}  # {identificador o None: (semillas, largo)}
+    for trozo in _bloques(semillas_iniciales, bloque):
+        if tabla is not None or saltos is not None:
+            if tabla is not None:
+                profundidad = tabla.profundidades(trozo)
+            else:
+                profundidad = profundidades_saltos(trozo, saltos, objetivo, max_niveles)
+            sin_llegar = profundidad < 0
+            ciclos = detectar_ciclos(como_arreglo(valores_iniciales(trozo))[sin_llegar], regla) if sin_llegar.any() else None
+        else:
+            profundidad, ciclos = profundidades_y_ciclos(trozo, regla, objetivo, max_niveles)
+            sin_llegar = profundidad < 0
+            ciclos = ResultadoCiclos(*(a[sin_llegar] for a in ciclos)) if sin_llegar.any() else None
+        if ciclos is not None:
+            for identificador, (cantidad, largo) in resumen_ciclos(ciclos).items():
+                otros_ciclos[identificador] = (otros_ciclos.get(identificador, (0, largo))[0] + cantidad, largo)
+        conteo = np.bincount(profundidad[~sin_llegar])
+        if len(conteo) > len(llegadas):
+            llegadas = np.concatenate([llegadas, np.zeros(len(conteo) - len(llegadas), dtype=np.int64)])
+        llegadas[:len(conteo)] += conteo
+        posicion = int(profundidad.argmax())
+        if profundidad[posicion] > profundidad_maxima:
+            profundidad_maxima = int(profundidad[posicion])
+            culpable = int(trozo[posicion])
+    acumuladas = np.cumsum(llegadas)
+    hitos = {}
+    for nivel in sorted(set(niveles_interes) | {profundidad_maxima}):
+        if 0 < nivel <= profundidad_maxima:
+            hitos[nivel] = int(acumuladas[nivel])
+            if imprimir:
+                print(f"HIT -> Nivel {nivel:3} | Semillas en '{objetivo}': {hitos[nivel]:5}/{total} ({hitos[nivel] / total * 100:6.2f}%)")
+    if imprimir:
+        for identificador, (cantidad, largo) in otros_ciclos.items():
+            if identificador is None:
+                print(f"Sin clasificar (no llegan en {max_niveles} niveles): {cantidad} semillas")
+            else:
+                print(f"Ciclo {identificador} (largo {largo}): {cantidad} semillas")
+    return profundidad_maxima, culpable, hitos
@@ -0,0 +1,149 @@
+from math import gcd
+from typing import NamedTuple
+
+import numpy as np
+from paso_hibrido import MAXIMO_INT64, ArregloHibrido, simplificar
+
+# Familia de mapas tipo Collatz como datos en vez de funciones copiadas.
+# Una regla tiene un módulo y, para cada residuo n % modulo, una rama afín
+# (multiplicador * n + suma) // divisor con la letra del árbol (R o L).
+# arbol_numpy (int64, object o ArregloHibrido) y nodo_collatz reciben la regla y
+# usan sus núcleos vectorizados para cualquier variante; COLLATZ sigue por el
+# camino especializado de siempre.
+
+class Rama(NamedTuple):
+    multiplicador: int
+    suma: int
+    divisor: int
+    letra: str
+
+class Regla:
+    def __init__(self, nombre, modulo, ramas):
+        if len(ramas) != modulo:
+            raise ValueError(f"La regla {nombre} necesita una rama por residuo ({modulo})")
+        self.nombre = nombre
+        self.modulo = modulo
+        self.ramas = ramas
+        self.residuos = {letra: [r for r, rama in enumerate(ramas) if rama.letra == letra] for letra in ("R", "L")}
+        # |n| <= limite garantiza que multiplicador * n + suma cabe en int64
+        self.limite = min((MAXIMO_INT64 - abs(rama.suma)) // max(abs(rama.multiplicador), 1) for rama in ramas)
+
+    def __repr__(self):
+        return f"Regla({self.nombre!r})"
+
+    def aplicar(self, n):
+        # Mismo contrato que collatz(n) de los scripts: (valor, letra)
+        rama = self.ramas[n % self.modulo]
+        return (rama.multiplicador * n + rama.suma) // rama.divisor, rama.letra
+
+    def siguiente(self, n):
+        return self.aplicar(n)[0]
+
+    def desborda(self, valores):
+        # True si algún valor int64 se saldría de rango al aplicar la regla
+        if valores.dtype == object or len(valores) == 0:
+            return False
+        return bool(valores.max() > self.limite or valores.min() < -self.limite)
+
+    def desbordados(self, valores):
+        # Máscara de los valores int64 que podrían salirse de rango al aplicar la regla
+        if valores.dtype == object:
+            return np.zeros(len(valores), dtype=bool)
+        return (valores > self.limite) | (valores < -self.limite)
+
+    def paso_vectorizado(self, valores):
+        # Divide un arreglo (int64 u object) en (grupo R, grupo L) conservando el orden
+        residuos = valores % self.modulo
+        grupos = []
+        for letra in ("R", "L"):
+            mascara = np.isin(residuos, self.residuos[letra])
+            seleccion = valores[mascara]
+            salida = np.empty_like(seleccion)
+            if len(self.residuos[letra]) == 1:
+                rama = self.ramas[self.residuos[letra][0]]
+                salida[:] = (seleccion * rama.multiplicador + rama.suma) // rama.divisor
+            else:
+                residuos_sel = residuos[mascara]
+                for r in self.residuos[letra]:
+                    rama = self.ramas[r]
+                    cual = residuos_sel == r
+                    salida[cual] = (seleccion[cual] * rama.multiplicador + rama.suma) // rama.divisor
+            grupos.append(salida)
+        return grupos[0], grupos[1]
+
+    def _residuos(self, valores):
+        if self.modulo & (self.modulo - 1) == 0:
+            return valores & (self.modulo - 1)
+        return valores % self.modulo
+
+    def _rama_completa(self, valores, rama):
+        # La rama aplicada a todos los carriles (sin máscaras ni copias por índice)
+        salida = valores * rama.multiplicador if rama.multiplicador != 1 else valores
+        if rama.suma:
+            salida = salida + rama.suma
+        if rama.divisor == 1:
+            return salida
+        if valores.dtype != object and rama.divisor & (rama.divisor - 1) == 0:
+            return salida >> (rama.divisor.bit_length() - 1)
+        return salida // rama.divisor
+
+    def siguiente_vectorizado(self, valores):
+        # Un paso por carril, sin separar por letra: salida[i] = siguiente(valores[i]).
+        # Se calculan todas las ramas sobre el arreglo entero y se elige por residuo,
+        # que con pocos residuos es más barato que separar y volver a juntar.
+        residuos = self._residuos(valores)
+        salida = self._rama_completa(valores, self.ramas[0])
+        for r, rama in enumerate(self.ramas[1:], start=1):
+            salida = np.where(residuos == r, self._rama_completa(valores, rama), salida)
+        return salida
+
+    def expandir_serie(self, d, p):
+        # Hijos simbólicos de la serie d + p*k: los residuos se repiten con período
+        # modulo / gcd(p, modulo), así que dos períodos más uno alcanzan para ver
+        # si cada letra forma una progresión. Devuelve ((d, p) o None) por letra,
+        # o lanza ValueError("NoSimple") si una letra no es una progresión.
+        periodo = self.modulo // gcd(p, self.modulo)
+        valores = {"R": [], "L": []}
+        for k in range(2 * periodo + 1):
+            v, letra = self.aplicar(d + p * k)
+            valores[letra].append(v)
+        hijos = []
+        for letra in ("R", "L"):
+            serie = valores[letra]
+            if not serie:
+                hijos.append(None)
+                continue
+            salto = serie[1] - serie[0]
+            if any(serie[i + 1] - serie[i] != salto for i in range(len(serie) - 1)):
+                raise ValueError("NoSimple")
+            hijos.append((serie[0], salto))
+        return hijos[0], hijos[1]
+
+COLLATZ = Regla("3n+1", 2, (Rama(1, 0, 2, "R"), Rama(3, 1, 1, "L")))
+COLLATZ_5 = Regla("5n+1", 2, (Rama(1, 0, 2, "R"), Rama(5, 1, 1, "L")))
+# collatz2 de 3_grafica*.py: n-1 en los pares, n+1 en los impares
+COLLATZ_2 = Regla("n-1/n+1", 2, (Rama(1, -1, 1, "R"), Rama(1, 1, 1, "L")))
+# collatz3 de 3_grafica2.py: n/2 en los pares, n+1 en los impares
+COLLATZ_3 = Regla("n/2,n+1", 2, (Rama(1, 0, 2, "R"), Rama(1, 1, 1, "L")))
+
+def regla_qn_mas_1(q):
+    return Regla(f"{q}n+1", 2, (Rama(1, 0, 2, "R"), Rama(q, 1, 1, "L")))
+
+def paso_regla(valores, regla):
+    # Paso vectorizado de cualquier regla sobre int64, object o ArregloHibrido.
+    # Si algún valor int64 se desbordaría, el nodo entero pasa a enteros de Python
+    # y cada grupo vuelve a int64 en cuanto cabe (como en paso_hibrido).
+    if isinstance(valores, ArregloHibrido):
+        valores = valores.como_arreglo()
+    if valores.dtype != object and not regla.desborda(valores):
+        return regla.paso_vectorizado(valores)
+    grupo_r, grupo_l = regla.paso_vectorizado(valores.astype(object))
+    return simplificar(ArregloHibrido.desde(grupo_r)), simplificar(ArregloHibrido.desde(grupo_l))
+
+def paso_carriles(valores, regla=COLLATZ):
+    # Paso de cada carril en su lugar (trayectorias, no árbol). Si algún valor
+    # int64 se desbordaría, todo el arreglo pasa a enteros de Python; los barridos
+    # largos apartan antes esos carriles con Regla.desbordados para no pagar eso.
+    if valores.dtype != object and regla.desborda(valores):
+        valores = valores.astype(object)
+    return regla.siguiente_vectorizado(valores)
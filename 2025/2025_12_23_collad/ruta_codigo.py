@@ -0,0 +1,136 @@
+from collections.abc import Iterable
+from fractions import Fraction
+from functools import lru_cache
+
+import numpy as np
+
+# Ruta compacta: un entero con la forma (marca << longitud) | bits.
+#   - bits: una letra por bit, R = 1 y L = 0 (así el orden numérico dentro de un
+#     nivel es el mismo que el orden alfabético de los textos "L..." < "R...").
+#   - marca: 0b10 para las rutas que empiezan en "" y 0b11 para las que empiezan en "N".
+# Agregar una letra es un desplazamiento y un OR; el texto solo se arma al imprimir.
+
+MARCA_VACIA = 0b10
+MARCA_N = 0b11
+
+class Ruta(int):
+    __slots__ = ()
+
+    @classmethod
+    def raiz(cls, prefijo: str = "") -> "Ruta":
+        return cls(MARCA_N if prefijo == "N" else MARCA_VACIA)
+
+    @classmethod
+    def desde_texto(cls, texto: str) -> "Ruta":
+        return _desde_texto(texto)
+
+    def hijo(self, letra: str) -> "Ruta":
+        return Ruta((int(self) << 1) | (letra == "R"))
+
+    def padre(self) -> "Ruta":
+        if self.longitud == 0:
+            raise ValueError("La raíz no tiene padre")
+        return Ruta(int(self) >> 1)
+
+    @property
+    def longitud(self) -> int:
+        return self.bit_length() - 2
+
+    @property
+    def bits(self) -> int:
+        return int(self) & ((1 << self.longitud) - 1)
+
+    @property
+    def prefijo(self) -> str:
+        return "N" if (int(self) >> self.longitud) == MARCA_N else ""
+
+    @property
+    def numerador_diadico(self) -> int:
+        # Numerador de calculateDyadicSurreal (Program.fs): suma de ±2^(n-1-i), + por R
+        # y - por L, que con R = 1 y L = 0 es 2*bits - (2^n - 1). El del hijo sale del
+        # padre con un desplazamiento y una suma: 2*numerador ± 1.
+        return 2 * self.bits - ((1 << self.longitud) - 1)
+
+    @property
+    def exponente_diadico(self) -> int:
+        return max(self.longitud - 1, 0)
+
+    def diadico(self) -> Fraction:
+        return Fraction(self.numerador_diadico, 1 << self.exponente_diadico)
+
+    def ultima(self) -> str:
+        if self.longitud == 0:
+            return self.prefijo
+        return "R" if int(self) & 1 else "L"
+
+    def startswith(self, texto: str) -> bool:
+        if texto == "":
+            return True
+        otra: Ruta = _desde_texto(texto)
+        diferencia: int = self.longitud - otra.longitud
+        if diferencia < 0:
+            return False
+        return (int(self) >> diferencia) == int(otra)
+
+    def count(self, letra: str) -> int:
+        unos: int = self.bits.bit_count()
+        if letra == "R":
+            return unos
+        if letra == "L":
+            return self.longitud - unos
+        if letra == "N":
+            return 1 if self.prefijo == "N" else 0
+        return 0
+
+    def __str__(self) -> str:
+        longitud: int = self.longitud
+        if longitud == 0:
+            return self.prefijo
+        return self.prefijo + format(self.bits, f"0{longitud}b").translate(_LETRAS)
+
+    def __format__(self, formato: str) -> str:
+        return format(str(self), formato)
+
+    def __repr__(self) -> str:
+        return f"Ruta('{self}')"
+
+_LETRAS = str.maketrans("01", "LR")
+
+_POTENCIAS = np.left_shift(np.int64(1), np.arange(63, dtype=np.int64))
+
+def diadicos_nivel(rutas: Iterable[int]) -> tuple[np.ndarray, np.ndarray]:
+    # Numeradores y exponentes diádicos de muchas rutas a la vez (por ejemplo las
+    # llaves de un nivel). En int64 mientras las rutas quepan; si no, enteros de Python.
+    codigos = [int(r) for r in rutas]
+    if codigos and max(codigos).bit_length() > 62:
+        numeradores = np.array([Ruta(c).numerador_diadico for c in codigos], dtype=object)
+        exponentes = np.array([Ruta(c).exponente_diadico for c in codigos], dtype=np.int64)
+        return numeradores, exponentes
+    codigos = np.asarray(codigos, dtype=np.int64)
+    longitudes = np.searchsorted(_POTENCIAS, codigos, side="right") - 2  # bit_length - 2
+    bits = codigos & (np.left_shift(np.int64(1), longitudes) - 1)
+    numeradores = 2 * bits - (np.left_shift(np.int64(1), longitudes) - 1)
+    return numeradores, np.maximum(longitudes - 1, 0)
+
+def flotantes_diadicos(numeradores: np.ndarray, exponentes: np.ndarray) -> np.ndarray:
+    return np.ldexp(numeradores.astype(np.float64), -np.asarray(exponentes, dtype=np.int64))
+
+def fracciones_diadicas(numeradores: np.ndarray, exponentes: np.ndarray) -> list[Fraction]:
+    return [Fraction(int(n), 1 << int(e)) for n, e in zip(numeradores, exponentes)]
+
+def formatear_diadico(ruta: Ruta) -> str:
+    # Texto de calculateDyadicSurreal: "numerador / 2^exponente valor"; igual que
+    # allá, el valor de las rutas de una letra (exponente 0) se imprime como 0.0
+    if ruta.longitud == 0:
+        return "0 / 2^0"
+    valor = float(ruta.diadico()) if ruta.exponente_diadico else 0.0
+    return f"{ruta.numerador_diadico} / 2^{ruta.exponente_diadico} {valor:<16}"
+
+@lru_cache(maxsize=1024)
+def _desde_texto(texto: str) -> Ruta:
+    ruta: Ruta = Ruta.raiz("N" if texto.startswith("N") else "")
+    for letra in texto[len(ruta.prefijo):]:
+        if letra not in "RL":
+            raise ValueError(f"Letra de ruta inválida: {letra!r}")
+        ruta = ruta.hijo(letra)
+    return ruta
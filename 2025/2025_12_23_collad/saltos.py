@@ -0,0 +1,50 @@
+import numpy as np
+from paso_hibrido import MAXIMO_INT64
+from reglas import COLLATZ
+
+# Tablas de salto de k pasos para el mapa acortado T (n/2 en los pares, (a*n + b)/2
+# en los impares). Con n = 2^k * q + r (0 <= r < 2^k):
+#     T^k(n) = a^c(r) * q + T^k(r)
+# donde c(r) es la cantidad de pasos impares de r en sus primeros k pasos. Así un
+# solo acceso a la tabla avanza k pasos de T, que son k + c(r) pasos de collatz(n).
+
+class TablaSaltos:
+    def __init__(self, k=16, regla=COLLATZ):
+        par, impar = regla.ramas if regla.modulo == 2 else (None, None)
+        if (par is None or (par.multiplicador, par.suma, par.divisor) != (1, 0, 2) or impar.divisor != 1
+                or impar.multiplicador % 2 == 0 or impar.suma % 2 == 0):
+            raise ValueError(f"La regla {regla.nombre} no tiene la forma n/2, a*n + b (a y b impares)")
+        self.k = k
+        self.regla = regla
+        self.a = impar.multiplicador
+        self.b = impar.suma
+        self.modulo = 1 << k
+        # c(r) y T^k(r) para todos los residuos, avanzando k pasos de T a la vez
+        valores = np.arange(self.modulo, dtype=np.int64)
+        impares = np.zeros(self.modulo, dtype=np.int64)
+        for _ in range(k):
+            es_impar = valores & 1
+            valores = np.where(es_impar == 1, (valores * self.a + self.b) >> 1, valores >> 1)
+            impares += es_impar
+        self.impares = impares.astype(np.int8 if k < 128 else np.int64)
+        self.restos = valores
+        self.potencias = np.array([self.a ** c for c in range(k + 1)], dtype=object)
+        # |q| <= limite_q garantiza que a^c * q + T^k(r) cabe en int64
+        self.limite_q = (MAXIMO_INT64 - int(np.abs(valores).max())) // self.a ** k
+
+    def desbordados(self, valores):
+        # Máscara de los valores int64 cuyo salto no cabría en int64
+        if valores.dtype == object:
+            return np.zeros(len(valores), dtype=bool)
+        q = valores >> self.k
+        return (q > self.limite_q) | (q < -self.limite_q)
+
+    def saltar(self, valores):
+        # (T^k de cada valor, pasos de collatz(n) que representa cada salto)
+        q = valores >> self.k if valores.dtype != object else valores // self.modulo
+        r = (valores & (self.modulo - 1)).astype(np.int64)
+        c = self.impares[r].astype(np.int64)
+        if valores.dtype != object and len(q) and (q.max() > self.limite_q or q.min() < -self.limite_q):
+            q = q.astype(object)
+        potencias = self.potencias[c] if q.dtype == object else self.potencias[c].astype(np.int64)
+        return potencias * q + self.restos[r], self.k + c
@@ -12,7 +12,8 @@ def solve_knapsack_absi_pro(objects, capacity):
     # Sort objects by density (value/weight ratio)
     objects.sort(key=lambda x: x.density, reverse=True)
     best_value = 0
-    active_nodes = [(0, 0, "N")]  # (current_weight, current_value, path)
+    # path is bit-coded like ruta_codigo.Ruta: 0b11 is "N", then R = 1 and L = 0 per level
+    active_nodes = [(0, 0, 0b11)]  # (current_weight, current_value, path)
     
     for obj in objects:
         next_nodes = []
@@ -20,11 +21,11 @@ def solve_knapsack_absi_pro(objects, capacity):
             # Right branch: Take the object
             if current_weight + obj.weight <= capacity:
                 new_value = current_value + obj.value
-                next_nodes.append((current_weight + obj.weight, new_value, path + "R"))
+                next_nodes.append((current_weight + obj.weight, new_value, (path << 1) | 1))
                 if new_value > best_value:
                     best_value = new_value
             # Left branch: Skip the object
-            next_nodes.append((current_weight, current_value, path + "L"))
+            next_nodes.append((current_weight, current_value, path << 1))
         
         active_nodes = next_nodes
         
@@ -0,0 +1,95 @@
+import sys
+from functools import lru_cache
+
+from nodo_collatz import NodoCollatz, RAMA_VACIA, Ruta, expandir_simbolico
+
+# Censo del árbol simbólico sin construirlo.
+# La forma del subárbol de la serie d + p*k solo depende de la paridad de sus
+# elementos: con p = 2^a * impar, todos comparten d mod 2^a, y los hijos de
+# (d mod 2^a, 2^a) se reducen de la misma forma que los de (d, p). Así que el
+# subárbol se memoiza con la clave canónica (d mod 2^a, a) y la profundidad.
+
+def clave_canonica(d: int, p: int) -> tuple[int, int]:
+    a: int = (p & -p).bit_length() - 1
+    return (d % (1 << a), a)
+
+@lru_cache(maxsize=None)
+def _tamanos(residuo: int, a: int, profundidad: int) -> tuple[int, ...]:
+    # Nodos por nivel relativo (0..profundidad) del subárbol de la clave canónica
+    if profundidad == 0:
+        return (1,)
+    tamanos: list[int] = [1] + [0] * profundidad
+    for hijo in expandir_simbolico(residuo, 1 << a):
+        if hijo == RAMA_VACIA:
+            continue
+        for i, cantidad in enumerate(_tamanos(*clave_canonica(*hijo), profundidad - 1)):
+            tamanos[i + 1] += cantidad
+    return tuple(tamanos)
+
+def tamanos_subarbol(d: int, p: int, profundidad: int) -> tuple[int, ...]:
+    residuo, a = clave_canonica(d, p)
+    # Llenar la memoria de menor a mayor profundidad mantiene corta la recursión
+    for q1 in range(profundidad):
+        _tamanos(residuo, a, q1)
+    return _tamanos(residuo, a, profundidad)
+
+def conteos_podados(niveles: list[dict[Ruta, NodoCollatz]]) -> list[int]:
+    # Nodos por nivel del árbol completo a partir de un ArbolCollatz con
+    # podar_duplicados=True: cada duplicado sin expandir aporta el tamaño de su
+    # subárbol, que sale de la misma memoria del censo (exp2 ya es la potencia de 2)
+    profundidad: int = len(niveles) - 1
+    conteos: list[int] = [len(nivel) for nivel in niveles]
+    for i, nivel in enumerate(niveles[:-1]):
+        for nodo in nivel.values():
+            if nodo.referencia_original is None:
+                continue
+            clave: tuple[int, int] = (nodo.desplazamiento % (1 << nodo.exp2), nodo.exp2)
+            for q1 in range(1, profundidad - i + 1):
+                _tamanos(*clave, q1)  # de menor a mayor, como en tamanos_subarbol
+            for q1, cantidad in enumerate(_tamanos(*clave, profundidad - i)[1:], start=1):
+                conteos[i + q1] += cantidad
+    return conteos
+
+def nodo_en_ruta(d: int, p: int, ruta: str) -> tuple[int, int]:
+    # Sigue las letras de la ruta (sin la "N" inicial) desde (d, p)
+    for letra in ruta.lstrip("N"):
+        hijo_r, hijo_l = expandir_simbolico(d, p)
+        hijo: tuple[int, int] = hijo_r if letra == "R" else hijo_l
+        if hijo == RAMA_VACIA:
+            raise ValueError(f"La ruta {ruta} no existe en el árbol")
+        d, p = hijo
+    return (d, p)
+
+def censo(nodo_de_Inicio: NodoCollatz, niveles: int, prefijos: tuple[str, ...] = ("NR", "NLRRR")) -> dict[str, list[int]]:
+    # Cantidad de nodos por nivel, en total y para cada clase de prefijo
+    # (las rutas que empiezan con ese prefijo), igual que los reportes de 7.py
+    d: int = nodo_de_Inicio.desplazamiento
+    p: int = nodo_de_Inicio.progresion
+    resultado: dict[str, list[int]] = {"": list(tamanos_subarbol(d, p, niveles))}
+    inicio: int = nodo_de_Inicio.ruta.longitud
+    for prefijo in prefijos:
+        if nodo_de_Inicio.ruta.startswith(prefijo):
+            # Todo el árbol cae dentro de la clase
+            resultado[prefijo] = list(resultado[""])
+            continue
+        if not Ruta.desde_texto(prefijo).startswith(str(nodo_de_Inicio.ruta)):
+            resultado[prefijo] = [0] * (niveles + 1)
+            continue
+        letras: str = prefijo.lstrip("N")[inicio:]
+        try:
+            nodo: tuple[int, int] = nodo_en_ruta(d, p, letras)
+        except ValueError:
+            resultado[prefijo] = [0] * (niveles + 1)
+            continue
+        largo: int = len(letras)
+        if largo > niveles:
+            resultado[prefijo] = [0] * (niveles + 1)
+        else:
+            resultado[prefijo] = [0] * largo + list(tamanos_subarbol(*nodo, niveles - largo))
+    return resultado
+
+if __name__ == "__main__":
+    niveles: int = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    conteos: dict[str, list[int]] = censo(NodoCollatz(1, 1, "N", 0, False), niveles)
+    for i in range(niveles + 1):
+        print(f"NIVEL{i:3} {conteos[''][i]:16} NR {conteos['NR'][i]:16} NLRRR {conteos['NLRRR'][i]:16}")
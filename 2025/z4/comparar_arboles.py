@@ -0,0 +1,98 @@
+import hashlib
+import sys
+from typing import Iterable, NamedTuple, Optional
+
+from nodo_collatz import NodoCollatz, Ruta, iterar_arbol
+
+# Comparación de árboles por huellas (reemplazo de compararArboles de File1.fs).
+# Cada nodo se resume en un hash de 64 bits; la huella de un nivel es la suma de
+# los hashes de sus nodos módulo 2^64, así que no depende del orden de las llaves
+# y dos árboles se comparan en una sola pasada, nivel por nivel, sin ordenar nada.
+# Solo cuando la huella de un nivel no coincide se buscan las rutas distintas.
+
+MODULO: int = 1 << 64
+
+class ResultadoComparacion(NamedTuple):
+    iguales: bool
+    nivel: Optional[int] = None  # primer nivel distinto
+    ruta: Optional[Ruta] = None  # primera ruta distinta de ese nivel
+
+def huella_nodo(ruta: Ruta, nodo: NodoCollatz) -> int:
+    clave: str = ",".join(str(c) for c in nodo.clave())
+    texto: bytes = f"{int(ruta)},{clave},{int(nodo.es_duplicado)}".encode()
+    return int.from_bytes(hashlib.blake2b(texto, digest_size=8).digest(), "little")
+
+def huellas_nivel(nivel: dict[Ruta, NodoCollatz]) -> tuple[int, dict[Ruta, int]]:
+    # Devuelve la huella del nivel y la de cada nodo
+    por_ruta: dict[Ruta, int] = {ruta: huella_nodo(ruta, nodo) for ruta, nodo in nivel.items()}
+    return sum(por_ruta.values()) % MODULO, por_ruta
+
+class IndiceOcurrencias:
+    # Primera aparición y cantidad de apariciones de cada clave (desplazamiento, exp2, exp3);
+    # se llena durante la misma pasada de la comparación, así que la auditoría de
+    # duplicados es una consulta y no un nuevo recorrido del árbol. Ocupa una entrada
+    # por clave distinta, no una por nodo.
+    def __init__(self):
+        self.primeras: dict[tuple[int, ...], tuple[int, Ruta]] = {}
+        self.cantidades: dict[tuple[int, ...], int] = {}
+
+    def agregar_nivel(self, i: int, nivel: dict[Ruta, NodoCollatz]):
+        for ruta, nodo in nivel.items():
+            clave: tuple[int, ...] = nodo.clave()
+            if clave not in self.primeras:
+                self.primeras[clave] = (i, ruta)
+            self.cantidades[clave] = self.cantidades.get(clave, 0) + 1
+
+    def auditar(self, objetivo: tuple[int, ...], nivelFallo: int):
+        d_obj, exp2, exp3 = objetivo[:3]
+        print(f"--- AUDITORÍA DE DUPLICADO para ({d_obj}, 2^{exp2}*3^{exp3}) ---")
+        primera: Optional[tuple[int, Ruta]] = self.primeras.get(objetivo)
+        if primera is None or primera[0] > nivelFallo:
+            print("Raro: El patrón no existe en niveles anteriores. El 'true' podría estar mal.")
+        else:
+            i, ruta = primera
+            print(f"ORIGINAL ENCONTRADO en Nivel {i}, Ruta: {ruta}")
+            print(f"OTRAS APARICIONES: {self.cantidades[objetivo] - 1}")
+        print("-------------------------------------------")
+
+def comparar_arboles(arbol1: Iterable[dict[Ruta, NodoCollatz]], arbol2: Iterable[dict[Ruta, NodoCollatz]], auditar: bool = True) -> ResultadoComparacion:
+    # Acepta listas o los generadores de iterar_arbol: de los árboles solo se guarda un
+    # nivel a la vez. Con auditar=True además crece el índice de ocurrencias (una
+    # entrada por clave distinta del primer árbol); con False la memoria no depende
+    # de la profundidad.
+    indice: IndiceOcurrencias = IndiceOcurrencias()
+    niveles1 = iter(arbol1)
+    niveles2 = iter(arbol2)
+    i: int = 0
+    while True:
+        dict1: Optional[dict[Ruta, NodoCollatz]] = next(niveles1, None)
+        dict2: Optional[dict[Ruta, NodoCollatz]] = next(niveles2, None)
+        if dict1 is None and dict2 is None:
+            return ResultadoComparacion(True)
+        if dict1 is None or dict2 is None:
+            print(f"Fallo: Los árboles tienen diferentes niveles (el {'primero' if dict1 is None else 'segundo'} termina en {i})")
+            return ResultadoComparacion(False, i)
+        if auditar:
+            indice.agregar_nivel(i, dict1)
+        huella1, por_ruta1 = huellas_nivel(dict1)
+        huella2, por_ruta2 = huellas_nivel(dict2)
+        if huella1 != huella2:
+            distintas: list[Ruta] = [r for r in por_ruta1.keys() | por_ruta2.keys() if por_ruta1.get(r) != por_ruta2.get(r)]
+            ruta: Ruta = min(distintas)
+            print(f"Fallo en Nivel {i}, Ruta {ruta}: {len(distintas)} nodos distintos")
+            nodo1: Optional[NodoCollatz] = dict1.get(ruta)
+            nodo2: Optional[NodoCollatz] = dict2.get(ruta)
+            print(f"nodo1 {nodo1!r}")
+            print(f"nodo2 {nodo2!r}")
+            if auditar and nodo1 is not None and nodo2 is not None:
+                indice.auditar(nodo1.clave(), nodo2.nivel)
+            return ResultadoComparacion(False, i, ruta)
+        i += 1
+
+if __name__ == "__main__":
+    # Constructor por muestreo contra el simbólico
+    niveles: int = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    cantidadDeSemillas: int = 32
+    muestreo = iterar_arbol(NodoCollatz(1, 1, "N", 0, False), niveles, cantidadDeSemillas)
+    simbolico = iterar_arbol(NodoCollatz(1, 1, "N", 0, False), niveles, cantidadDeSemillas, modo_simbolico=True)
+    print(comparar_arboles(muestreo, simbolico))
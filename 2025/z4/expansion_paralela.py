@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from nodo_collatz import ArbolCollatz, IndicePatrones, NodoCollatz, Regla, Ruta
+
+# Expansión paralela del árbol de NodoCollatz.
+# Hasta profundidad_corte el árbol crece en un solo proceso; después cada trozo
+# contiguo de la frontera crece por separado en otro proceso, sin marcas de
+# duplicado. Al unir, las marcas se recalculan con la misma regla que el
+# constructor serial: el primero es el de menor nivel y, dentro del nivel, el que
+# aparece antes en el orden de inserción (padre por padre, R antes que L), que es
+# el orden descendente del código Ruta. Como los trozos son contiguos en ese
+# orden, concatenarlos ya reproduce el orden serial de cada nivel.
+# Cada trozo ya sabe cuáles de sus nodos repiten una clave del mismo trozo (esos
+# son duplicados también en el árbol completo), así que al unir solo se consultan
+# en el índice las primeras apariciones de cada trozo.
+
+def expandir_trozo(trozo: list[tuple[int, tuple[int, ...]]], profundidad: int, niveles: int, cantidadDeSemillas: int, modo_simbolico: bool, regla: Optional[Regla] = None) -> list[tuple[list[int], list[tuple[int, ...]], list[int]]]:
+    # Por cada nivel nuevo devuelve (códigos de ruta, claves, posiciones de las
+    # primeras apariciones dentro del trozo) en orden de inserción. Se devuelven
+    # listas de enteros y no NodoCollatz porque son mucho más baratas de pasar
+    # entre procesos.
+    frontera: dict[Ruta, NodoCollatz] = {}
+    for codigo, clave in trozo:
+        ruta: Ruta = Ruta(codigo)
+        frontera[ruta] = NodoCollatz.desde_clave(clave, ruta, profundidad, False)
+    arbol: ArbolCollatz = ArbolCollatz.desde_frontera(frontera, profundidad, cantidadDeSemillas, modo_simbolico, guardar_niveles=False, regla=regla)
+    resultado: list[tuple[list[int], list[tuple[int, ...]], list[int]]] = []
+    for nivel in arbol.iterar(niveles):
+        nodos: list[NodoCollatz] = list(nivel.values())
+        resultado.append(([int(ruta) for ruta in nivel], [nodo.clave() for nodo in nodos], [q1 for q1, nodo in enumerate(nodos) if not nodo.es_duplicado]))
+    return resultado
+
+def _partir(frontera: dict[Ruta, NodoCollatz], partes: int) -> list[list[tuple[int, tuple[int, ...]]]]:
+    elementos: list[tuple[int, tuple[int, ...]]] = [(int(ruta), nodo.clave()) for ruta, nodo in frontera.items()]
+    tamano: int = max(1, -(-len(elementos) // partes))
+    return [elementos[q1:q1 + tamano] for q1 in range(0, len(elementos), tamano)]
+
+def generar_arbol_paralelo(nodo_de_Inicio: NodoCollatz, niveles: int, cantidadDeSemillas: int = 32, modo_simbolico: bool = True, profundidad_corte: Optional[int] = None, procesos: Optional[int] = None, indice: Optional[IndicePatrones] = None, regla: Optional[Regla] = None) -> list[dict[Ruta, NodoCollatz]]:
+    # Mismo resultado que generar_arbol(nodo_de_Inicio, niveles, cantidadDeSemillas, modo_simbolico, indice)
+    procesos = procesos or os.cpu_count()
+    arbol: ArbolCollatz = ArbolCollatz(nodo_de_Inicio, cantidadDeSemillas, modo_simbolico, indice, regla=regla)
+    if profundidad_corte is None:
+        # Crecer en serie hasta tener trabajo para todos los procesos
+        while arbol.profundidad < niveles and len(arbol.frontera) < procesos * 64:
+            arbol.extender(1)
+    else:
+        arbol.extender(min(profundidad_corte, niveles))
+    faltan: int = niveles - arbol.profundidad
+    if faltan == 0 or not arbol.frontera:
+        return arbol.niveles
+    trozos = _partir(arbol.frontera, procesos * 4)
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        tareas = [pool.submit(expandir_trozo, trozo, arbol.profundidad, faltan, cantidadDeSemillas, modo_simbolico, arbol.regla) for trozo in trozos]
+        resultados = [t.result() for t in tareas]
+    for q1 in range(faltan):
+        nivel: int = arbol.profundidad + q1 + 1
+        proximo: dict[Ruta, NodoCollatz] = {}
+        for resultado in resultados:
+            codigos, claves, primeros = resultado[q1]
+            rutas: list[Ruta] = [Ruta(codigo) for codigo in codigos]
+            # Un duplicado dentro del trozo también lo es en el árbol completo;
+            # solo las primeras apariciones del trozo se comparan con el índice
+            duplicados: list[bool] = [True] * len(codigos)
+            for q2 in primeros:
+                duplicados[q2] = arbol.indice.es_duplicado(claves[q2], rutas[q2], nivel)
+            for ruta, clave, isDup in zip(rutas, claves, duplicados):
+                nodo: NodoCollatz = NodoCollatz.desde_clave(clave, ruta, nivel, isDup)
+                if isDup:
+                    nodo.referencia_original = arbol.indice.primero(clave)
+                proximo[ruta] = nodo
+        arbol.niveles.append(proximo)
+    return arbol.niveles
+
+if __name__ == "__main__":
+    niveles: int = int(sys.argv[1]) if len(sys.argv) > 1 else 26
+    nuevo_nodo: NodoCollatz = NodoCollatz(1, 1, "N", 0, False)
+    inicio = time.perf_counter()
+    resultado = generar_arbol_paralelo(nuevo_nodo, niveles)
+    print(f"{niveles} {time.perf_counter() - inicio} nodos={len(resultado[-1])}")
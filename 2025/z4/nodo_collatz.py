@@ -0,0 +1,324 @@
+import os
+import sys
+from functools import lru_cache
+from typing import Callable, Iterator, Optional, Union
+
+# Los módulos compartidos (ruta_codigo, patrones, ...) viven junto a los scripts de 2025_12_23_collad
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "2025_12_23_collad"))
+from patrones import IndicePatrones, Patron, detectar_progresion
+from reglas import COLLATZ, Regla
+from ruta_codigo import Ruta
+
+# La progresión de un nodo solo se divide entre 2 o se multiplica por 3 o por 6,
+# así que se guarda como resto * 2^exp2 * 3^exp3, donde resto (coprimo con 6) es
+# el de la progresión inicial y se hereda sin cambios. La clave de un nodo es
+# (desplazamiento, exp2, exp3): el entero grande de la progresión no se arma ni
+# se compara, solo se calcula al pedir .progresion. Si resto no es 1 (una
+# progresión inicial rara o una regla como 5n+1) va como cuarto elemento.
+# La progresión 0 (un nodo constante) no se factoriza: queda como (0, 0, 0), con resto 0.
+
+@lru_cache(maxsize=None)
+def potencia_3(exp3: int) -> int:
+    return pow(3, exp3)
+
+def factorizar_progresion(p: int) -> tuple[int, int, int]:
+    # p = resto * 2^exp2 * 3^exp3
+    if p == 0:
+        return (0, 0, 0)
+    exp2: int = (p & -p).bit_length() - 1
+    p >>= exp2
+    exp3: int = 0
+    while p % 3 == 0:
+        p //= 3
+        exp3 += 1
+    return (exp2, exp3, p)
+
+class NodoCollatz:
+    def __init__(self, xdesplazamiento: int, xprogresion: int, xruta: Union[Ruta, str], xnivel: int, xisduplicate: bool):
+        self.desplazamiento: int = xdesplazamiento
+        self.exp2, self.exp3, self.resto = factorizar_progresion(xprogresion)
+        self.ruta: Ruta = xruta if isinstance(xruta, Ruta) else Ruta.desde_texto(xruta)
+        self.nivel: int = xnivel
+        self.es_duplicado : bool = xisduplicate
+        # (nivel, ruta) de la primera aparición del patrón, solo en los duplicados
+        self.referencia_original: Optional[tuple[int, Ruta]] = None
+    @classmethod
+    def desde_clave(cls, clave: tuple[int, ...], ruta: Ruta, nivel: int, isduplicate: bool) -> "NodoCollatz":
+        nodo: NodoCollatz = cls.__new__(cls)
+        nodo.desplazamiento, nodo.exp2, nodo.exp3 = clave[:3]
+        nodo.resto = clave[3] if len(clave) > 3 else 1
+        nodo.ruta = ruta
+        nodo.nivel = nivel
+        nodo.es_duplicado = isduplicate
+        nodo.referencia_original = None
+        return nodo
+    @property
+    def progresion(self) -> int:
+        return (self.resto * potencia_3(self.exp3)) << self.exp2
+    def clave(self) -> tuple[int, ...]:
+        if self.resto != 1:
+            return (self.desplazamiento, self.exp2, self.exp3, self.resto)
+        return (self.desplazamiento, self.exp2, self.exp3)
+    def __repr__(self) -> str:
+        mystr: str = ""
+        if(self.es_duplicado):
+            mystr ="#"
+        else:
+            mystr ="*"
+        return f"{self.ruta:32}(>{self.desplazamiento}N{self.progresion}{mystr})"
+    def GenerateList(self, xrange : int) -> list[int]:
+        mylist : list[int]=[]
+        progresion: int = self.progresion
+        for q1 in range(xrange):
+            mylist.append((progresion * q1) + self.desplazamiento)
+        return mylist
+    def mytuple(self) -> tuple[int, int]:
+        return (self.desplazamiento, self.progresion)
+
+def collatz(n: int) -> tuple[int, str]:
+    if n % 2 == 0: return n // 2, "R"
+    else: return (n * 3) + 1, "L"
+
+def detectar_patron(valores: list[int], cantidadDeSemillas: int) -> tuple[int, int]:
+    patron: Patron = detectar_progresion(valores, minimo=int(cantidadDeSemillas / 2))
+    if not patron.es_simple:
+        raise ValueError(patron.motivo)
+    return patron.tupla()
+
+# (-1, -1) marca una rama vacía, igual que en historial_de_resultados
+RAMA_VACIA: tuple[int, int] = (-1, -1)
+
+def expandir_muestreo(nodo: NodoCollatz, cantidadDeSemillas: int, regla: Optional[Regla] = None) -> tuple[tuple[int, int], tuple[int, int]]:
+    r_vals: list[int] = []
+    l_vals: list[int] = []
+    semillas: list[int] = nodo.GenerateList(cantidadDeSemillas)
+    paso: Callable[[int], tuple[int, str]] = collatz if regla is None else regla.aplicar
+    for s in semillas:
+        v, b = paso(s)
+        if b == "R":
+            r_vals.append(v)
+        else:
+            l_vals.append(v)
+    res_R: tuple[int, int] = RAMA_VACIA
+    res_L: tuple[int, int] = RAMA_VACIA
+    if len(r_vals) > 1:
+        res_R = detectar_patron(r_vals, cantidadDeSemillas)
+    if len(l_vals) > 1:
+        res_L = detectar_patron(l_vals, cantidadDeSemillas)
+    return (res_R, res_L)
+
+# Modo simbólico (secondMode de generateTree en Program.fs): los hijos de la serie
+# d + p*k salen directamente de la paridad de d y p, sin generar semillas.
+def expandir_simbolico(d: int, p: int) -> tuple[tuple[int, int], tuple[int, int]]:
+    d_par: bool = d % 2 == 0
+    p_par: bool = p % 2 == 0
+    if d_par and p_par:
+        # Toda la serie es par
+        return ((d // 2, p // 2), RAMA_VACIA)
+    if d_par:
+        # Pares en k par, impares en k impar
+        return ((d // 2, p), ((d * 3) + (p * 3) + 1, (p * 3) * 2))
+    if p_par:
+        # Toda la serie es impar (el caso "OE" que el F# solo imprime)
+        return (RAMA_VACIA, ((d * 3) + 1, p * 3))
+    # Impares en k par, pares en k impar
+    return (((d + p) // 2, p), ((d * 3) + 1, (p * 3) * 2))
+
+# Contadores de paridad de generateTree en Program.fs. La clase de (d, p) es
+# 2 * (d impar) + (p impar): EE, EO, OE, OO. EE..OO cuentan expansiones nuevas
+# (sin historial) según el nodo padre y EE2..OO2 los hijos creados.
+CLASES_PARIDAD: tuple[str, ...] = ("EE", "EO", "OE", "OO")
+
+def clase_paridad(d: int, p: int) -> int:
+    return ((d & 1) << 1) | (p & 1)
+
+def clase_clave(clave: tuple[int, ...]) -> int:
+    # La progresión de una clave es impar solo si exp2 == 0 y no es la progresión 0
+    return clase_paridad(clave[0], int(clave[1] == 0 and (len(clave) < 4 or clave[3] != 0)))
+
+def imprimir_umbral(contadores: "ContadoresParidad", exponente: int):
+    # Mismo formato que verifyAndPrint
+    e, h = contadores.expansiones, contadores.hijos
+    print(f"2^{exponente} EE={e[0]} EO={e[1]:<6} OE={e[2]:<6} OO={e[3]:<6} "
+          f"EE2={h[0]:<6} EO2={h[1]:<6} OE2={h[2]:<6} OO2={h[3]:<6} | Total={contadores.total}")
+
+class ContadoresParidad:
+    # Se actualizan una vez por nivel; al_cruzar(contadores, k) se llama por cada
+    # umbral 2^k que el total alcanzó en ese nivel.
+    def __init__(self, al_cruzar: Optional[Callable[["ContadoresParidad", int], None]] = imprimir_umbral, exponente: int = 1):
+        self.expansiones: list[int] = [0, 0, 0, 0]
+        self.hijos: list[int] = [0, 0, 0, 0]
+        self.exponente: int = exponente
+        self.al_cruzar = al_cruzar
+
+    @property
+    def total(self) -> int:
+        return sum(self.expansiones) + sum(self.hijos)
+
+    def __getitem__(self, nombre: str) -> int:
+        if nombre.endswith("2"):
+            return self.hijos[CLASES_PARIDAD.index(nombre[:2])]
+        return self.expansiones[CLASES_PARIDAD.index(nombre)]
+
+    def sumar_nivel(self, expansiones: list[int], hijos: list[int]):
+        for q1 in range(4):
+            self.expansiones[q1] += expansiones[q1]
+            self.hijos[q1] += hijos[q1]
+        total: int = self.total
+        while total >= (1 << self.exponente):
+            if self.al_cruzar is not None:
+                self.al_cruzar(self, self.exponente)
+            self.exponente += 1
+
+    def __repr__(self) -> str:
+        return " ".join(f"{c}={self.expansiones[q1]} {c}2={self.hijos[q1]}" for q1, c in enumerate(CLASES_PARIDAD)) + f" Total={self.total}"
+
+def expandir_exponentes(d: int, exp2: int, exp3: int, resto: int = 1) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    # expandir_simbolico sobre claves (d, exp2, exp3[, resto]): p es impar si y solo
+    # si exp2 == 0, y solo en ese caso hace falta su valor (resto * 3^exp3)
+    cola: tuple[int, ...] = (resto,) if resto != 1 else ()
+    if resto == 0:
+        # Serie constante: todos sus valores van a la misma rama
+        if d % 2 == 0:
+            return ((d // 2, 0, 0, 0), RAMA_VACIA)
+        return (RAMA_VACIA, ((d * 3) + 1, 0, 0, 0))
+    if d % 2 == 0:
+        if exp2 > 0:
+            return ((d // 2, exp2 - 1, exp3) + cola, RAMA_VACIA)
+        p: int = resto * potencia_3(exp3)
+        return ((d // 2, 0, exp3) + cola, ((d * 3) + (p * 3) + 1, 1, exp3 + 1) + cola)
+    if exp2 > 0:
+        return (RAMA_VACIA, ((d * 3) + 1, exp2, exp3 + 1) + cola)
+    p: int = resto * potencia_3(exp3)
+    return (((d + p) // 2, 0, exp3) + cola, ((d * 3) + 1, 1, exp3 + 1) + cola)
+
+def _como_clave(hijo: Optional[tuple[int, int]]) -> tuple[int, ...]:
+    # (d, p) de expandir_muestreo o de Regla.expandir_serie -> (d, exp2, exp3[, resto])
+    if hijo is None or hijo == RAMA_VACIA:
+        return RAMA_VACIA
+    exp2, exp3, resto = factorizar_progresion(hijo[1])
+    if resto != 1:
+        return (hijo[0], exp2, exp3, resto)
+    return (hijo[0], exp2, exp3)
+
+class ArbolCollatz:
+    # Árbol persistente: guarda la frontera, el índice de patrones y
+    # historial_de_resultados, así que extender(k) agrega k niveles sobre lo ya
+    # construido en vez de empezar de cero como generar_arbol.
+    # indice guarda el primer (nivel, ruta) de cada patrón; si se pasa uno cargado
+    # de disco, los duplicados se marcan contra lo visto en corridas anteriores.
+    # contadores, si se pasa, recibe las cuentas de paridad al cerrar cada nivel.
+    # Con guardar_niveles=False solo se conserva la frontera.
+    # Con podar_duplicados=True solo se expanden las primeras apariciones: los
+    # duplicados quedan como hojas que apuntan a su original, y censo.conteos_podados
+    # recupera la cantidad de nodos del árbol completo.
+    # Con regla (reglas.py) el árbol es el de esa variante; el modo simbólico usa
+    # Regla.expandir_serie y el muestreo aplica la regla a las semillas.
+    # Los historiales usan la clave (desplazamiento, exp2, exp3) de NodoCollatz.
+    # historial_de_resultados solo se usa en el modo por muestreo (en el simbólico
+    # expandir cuesta O(1)); con un índice acotado (patrones.IndiceAcotado) guarda a
+    # lo sumo max_en_memoria entradas y descarta las más viejas. Los contadores
+    # necesitan saber qué claves ya se expandieron, así que solo con contadores se
+    # guarda el conjunto expandidas.
+    def __init__(self, nodo_de_Inicio: NodoCollatz, cantidadDeSemillas: int = 32, modo_simbolico: bool = False, indice: Optional[IndicePatrones] = None, contadores: Optional[ContadoresParidad] = None, guardar_niveles: bool = True, podar_duplicados: bool = False, regla: Optional[Regla] = None):
+        self.cantidadDeSemillas: int = cantidadDeSemillas
+        self.modo_simbolico: bool = modo_simbolico
+        self.regla: Optional[Regla] = None if regla is COLLATZ else regla
+        self.podar_duplicados: bool = podar_duplicados
+        self.indice: IndicePatrones = indice if indice is not None else IndicePatrones()
+        self.contadores: Optional[ContadoresParidad] = contadores
+        self.historial_de_resultados: dict[tuple[int,...], tuple[tuple[int,...],tuple[int,...]]] = {}
+        self.max_historial: Optional[int] = getattr(self.indice, "max_en_memoria", None)
+        self.expandidas: set[tuple[int, ...]] = set()
+        self.frontera: dict[Ruta, NodoCollatz] = {nodo_de_Inicio.ruta: nodo_de_Inicio}
+        self.profundidad: int = 0
+        self.niveles: Optional[list[dict[Ruta, NodoCollatz]]] = [self.frontera] if guardar_niveles else None
+
+    @classmethod
+    def desde_frontera(cls, frontera: dict[Ruta, NodoCollatz], profundidad: int, cantidadDeSemillas: int = 32, modo_simbolico: bool = False, indice: Optional[IndicePatrones] = None, guardar_niveles: bool = True, regla: Optional[Regla] = None) -> "ArbolCollatz":
+        # Retoma la construcción desde varios nodos de un mismo nivel (por ejemplo un
+        # trozo de la frontera de otro árbol)
+        primero: NodoCollatz = next(iter(frontera.values()))
+        arbol: ArbolCollatz = cls(primero, cantidadDeSemillas, modo_simbolico, indice, None, guardar_niveles, regla=regla)
+        arbol.frontera = dict(frontera)
+        arbol.profundidad = profundidad
+        if guardar_niveles:
+            arbol.niveles = [arbol.frontera]
+        return arbol
+
+    def __len__(self) -> int:
+        return self.profundidad + 1
+
+    def _expandir(self, nodo: NodoCollatz, llave_nodo: tuple[int, ...]) -> tuple[tuple[int, ...], tuple[int, ...]]:
+        if self.modo_simbolico:
+            if self.regla is None:
+                return expandir_exponentes(*llave_nodo)
+            res_R, res_L = self.regla.expandir_serie(llave_nodo[0], nodo.progresion)
+            return (_como_clave(res_R), _como_clave(res_L))
+        res_R, res_L = expandir_muestreo(nodo, self.cantidadDeSemillas, self.regla)
+        resultado: tuple[tuple[int, ...], tuple[int, ...]] = (_como_clave(res_R), _como_clave(res_L))
+        if self.max_historial is not None and len(self.historial_de_resultados) >= self.max_historial:
+            # Los dict conservan el orden de inserción: la primera es la más vieja
+            del self.historial_de_resultados[next(iter(self.historial_de_resultados))]
+        self.historial_de_resultados[llave_nodo] = resultado
+        return resultado
+
+    def _siguiente_nivel(self) -> dict[Ruta, NodoCollatz]:
+        q1: int = self.profundidad
+        proximo: dict[Ruta, NodoCollatz] = {}
+        expansiones_nivel: list[int] = [0, 0, 0, 0]
+        hijos_nivel: list[int] = [0, 0, 0, 0]
+        for ruta, q2NodoCollatzx in self.frontera.items():
+            if self.podar_duplicados and q2NodoCollatzx.es_duplicado:
+                # Su subárbol repite el del original (todos sus nodos serían duplicados)
+                continue
+            llave_nodo: tuple[int, ...] = q2NodoCollatzx.clave()
+            if self.contadores is not None and llave_nodo not in self.expandidas:
+                self.expandidas.add(llave_nodo)
+                expansiones_nivel[clase_clave(llave_nodo)] += 1
+            tupleV: Optional[tuple[tuple[int, ...], tuple[int, ...]]] = self.historial_de_resultados.get(llave_nodo)
+            if tupleV is None:
+                tupleV = self._expandir(q2NodoCollatzx, llave_nodo)
+            tupleR: tuple[int, ...] = tupleV[0]
+            tupleL: tuple[int, ...] = tupleV[1]
+            if tupleR != RAMA_VACIA:
+                ruta_r: Ruta = ruta.hijo("R")
+                isDup: bool = self.indice.es_duplicado(tupleR, ruta_r, q1+1)
+                proximo[ruta_r] = NodoCollatz.desde_clave(tupleR, ruta_r, q1+1, isDup)
+                if isDup:
+                    proximo[ruta_r].referencia_original = self.indice.primero(tupleR)
+                hijos_nivel[clase_clave(tupleR)] += 1
+            if tupleL != RAMA_VACIA:
+                ruta_l: Ruta = ruta.hijo("L")
+                isDup: bool = self.indice.es_duplicado(tupleL, ruta_l, q1+1)
+                proximo[ruta_l] = NodoCollatz.desde_clave(tupleL, ruta_l, q1+1, isDup)
+                if isDup:
+                    proximo[ruta_l].referencia_original = self.indice.primero(tupleL)
+                hijos_nivel[clase_clave(tupleL)] += 1
+        if self.contadores is not None:
+            self.contadores.sumar_nivel(expansiones_nivel, hijos_nivel)
+        self.frontera = proximo
+        self.profundidad += 1
+        if self.niveles is not None:
+            self.niveles.append(proximo)
+        return proximo
+
+    def iterar(self, k: int) -> Iterator[dict[Ruta, NodoCollatz]]:
+        # Agrega k niveles y entrega cada uno al terminarlo
+        for _ in range(k):
+            yield self._siguiente_nivel()
+
+    def extender(self, k: int) -> dict[Ruta, NodoCollatz]:
+        # Agrega k niveles y devuelve la nueva frontera
+        for _ in self.iterar(k):
+            pass
+        return self.frontera
+
+def iterar_arbol(nodo_de_Inicio : NodoCollatz, niveles : int, cantidadDeSemillas: int = 32, modo_simbolico: bool = False, indice: Optional[IndicePatrones] = None, contadores: Optional[ContadoresParidad] = None) -> Iterator[dict[Ruta, NodoCollatz]]:
+    # Entrega un nivel a la vez y solo conserva la frontera actual
+    arbol: ArbolCollatz = ArbolCollatz(nodo_de_Inicio, cantidadDeSemillas, modo_simbolico, indice, contadores, guardar_niveles=False)
+    yield arbol.frontera
+    yield from arbol.iterar(niveles)
+
+def generar_arbol(nodo_de_Inicio : NodoCollatz, niveles : int, cantidadDeSemillas: int = 32, modo_simbolico: bool = False, indice: Optional[IndicePatrones] = None, contadores: Optional[ContadoresParidad] = None) -> list[dict[Ruta, NodoCollatz]]:
+    return list(iterar_arbol(nodo_de_Inicio, niveles, cantidadDeSemillas, modo_simbolico, indice, contadores))
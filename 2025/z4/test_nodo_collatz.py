@@ -0,0 +1,47 @@
+from nodo_collatz import ArbolCollatz, ContadoresParidad, NodoCollatz, factorizar_progresion
+from patrones import IndiceAcotado
+
+def _raiz():
+    return NodoCollatz(1, 1, "N", 0, False)
+
+def _firma(niveles):
+    return [[(int(ruta), nodo.clave(), nodo.es_duplicado) for ruta, nodo in nivel.items()] for nivel in niveles]
+
+def test_simbolico_sin_historial():
+    # En el modo simbólico no se guarda nada por clave; los contadores siguen iguales
+    contadores: ContadoresParidad = ContadoresParidad(None)
+    arbol: ArbolCollatz = ArbolCollatz(_raiz(), modo_simbolico=True, contadores=contadores, guardar_niveles=False)
+    arbol.extender(18)
+    assert len(arbol.historial_de_resultados) == 0
+    assert contadores.total > 0
+
+def test_memoria_acotada_con_indice_acotado():
+    # Con IndiceAcotado ni el historial ni las claves en memoria del índice pasan de
+    # max_en_memoria, por más niveles que se agreguen
+    maximo: int = 64
+    with IndiceAcotado(memoria_filtro=1 << 12, max_en_memoria=maximo) as indice:
+        arbol: ArbolCollatz = ArbolCollatz(_raiz(), indice=indice, guardar_niveles=False)
+        tamanos: list[tuple[int, int]] = []
+        for _ in arbol.iterar(16):
+            tamanos.append((len(arbol.historial_de_resultados), len(indice.recientes)))
+        assert len(indice) > maximo
+        assert all(historial <= maximo and recientes <= maximo for historial, recientes in tamanos)
+
+def test_historial_acotado_no_cambia_el_arbol():
+    with IndiceAcotado(memoria_filtro=1 << 12, max_en_memoria=16) as indice:
+        acotado: ArbolCollatz = ArbolCollatz(_raiz(), indice=indice)
+        acotado.extender(12)
+        completo: ArbolCollatz = ArbolCollatz(_raiz())
+        completo.extender(12)
+        assert _firma(acotado.niveles) == _firma(completo.niveles)
+
+def test_progresion_cero():
+    # Un nodo constante (progresión 0) se acepta como antes y cada nivel tiene un solo hijo
+    assert factorizar_progresion(0) == (0, 0, 0)
+    nodo: NodoCollatz = NodoCollatz(6, 0, "N", 0, False)
+    assert nodo.progresion == 0
+    for modo_simbolico in (True, False):
+        arbol: ArbolCollatz = ArbolCollatz(NodoCollatz(6, 0, "N", 0, False), modo_simbolico=modo_simbolico)
+        arbol.extender(8)
+        valores: list[tuple[int, int]] = [nodo.mytuple() for nivel in arbol.niveles for nodo in nivel.values()]
+        assert valores == [(6, 0), (3, 0), (10, 0), (5, 0), (16, 0), (8, 0), (4, 0), (2, 0), (1, 0)]